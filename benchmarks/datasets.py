@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict
+
+DatasetFactory = Callable[[int, np.random.Generator], pd.DataFrame]
+
+# approximate bytes per row of each dataset kind, used to skip sizes that would not fit in memory
+ROW_BYTES: Dict[str, int] = {
+    "numeric": 48,
+    "categorical": 250,
+    "wide": 800,
+    "high_cardinality": 90,
+}
+
+def numeric_dataset(n_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Generate a numeric dataset with correlated features and a binary label.
+
+    Args:
+        n_rows (int): Number of rows to generate.
+        rng (np.random.Generator): Random number generator.
+    Returns:
+        pd.DataFrame: The generated dataframe.
+    """
+    x1 = rng.normal(loc=50, scale=10, size=n_rows)
+    x2 = rng.gamma(shape=2.0, scale=3.0, size=n_rows)
+    target = 3 * x1 - 2 * x2 + rng.normal(scale=5, size=n_rows)
+    label = (target > np.median(target)).astype("int64")
+    return pd.DataFrame({
+        "x1": x1,
+        "x2": x2,
+        "count": rng.poisson(lam=4, size=n_rows).astype("int64"),
+        "target": target,
+        "label": label,
+    })
+
+def categorical_dataset(n_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Generate a dataset of low-cardinality text columns plus one numeric column.
+
+    Args:
+        n_rows (int): Number of rows to generate.
+        rng (np.random.Generator): Random number generator.
+    Returns:
+        pd.DataFrame: The generated dataframe.
+    """
+    regions = np.array(["north", "south", "east", "west", "central"], dtype=object)
+    segments = np.array(["retail", "wholesale", "online"], dtype=object)
+    flags = np.array(["yes", "no"], dtype=object)
+    return pd.DataFrame({
+        "region": regions[rng.integers(0, len(regions), size=n_rows)],
+        "segment": segments[rng.integers(0, len(segments), size=n_rows)],
+        "flag_a": flags[rng.integers(0, 2, size=n_rows)],
+        "flag_b": flags[rng.integers(0, 2, size=n_rows)],
+        "value": rng.normal(size=n_rows),
+    })
+
+def wide_dataset(n_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Generate a wide dataset of 100 numeric columns.
+
+    Args:
+        n_rows (int): Number of rows to generate.
+        rng (np.random.Generator): Random number generator.
+    Returns:
+        pd.DataFrame: The generated dataframe.
+    """
+    values = rng.normal(size=(n_rows, 100))
+    return pd.DataFrame(values, columns=[f"f{i}" for i in range(values.shape[1])])
+
+def high_cardinality_dataset(n_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Generate a dataset with a text column where roughly half of the values are unique.
+
+    Args:
+        n_rows (int): Number of rows to generate.
+        rng (np.random.Generator): Random number generator.
+    Returns:
+        pd.DataFrame: The generated dataframe.
+    """
+    ids = rng.integers(0, max(1, n_rows // 2), size=n_rows)
+    return pd.DataFrame({
+        "customer": pd.Series(ids).map("cust_{:08d}".format).astype(object),
+        "amount": rng.exponential(scale=100, size=n_rows),
+    })
+
+DATASETS: Dict[str, DatasetFactory] = {
+    "numeric": numeric_dataset,
+    "categorical": categorical_dataset,
+    "wide": wide_dataset,
+    "high_cardinality": high_cardinality_dataset,
+}
@@ -0,0 +1,263 @@
+"""
+Concurrent-session load test for the Streamlit app.
+
+Simulated sessions drive `streamlit_app.py` in-process through Streamlit's app-testing
+API (`streamlit.testing.v1.AppTest`), so they share the server-wide job scheduler and
+memory manager just like real browser sessions. AppTest cannot drive `st.file_uploader`,
+so the harness replaces it with one that returns in-memory CSV files and the real Load &
+Clean page parses, encodes and previews them and records a cleaning step, which the other
+pages then apply. Every script rerun is timed, including the time it waits behind the reruns
+of other sessions: AppTest can only run one script at a time, so reruns are serialized and
+latencies at N sessions are an upper bound for a server running scripts on parallel threads.
+Memory is the size of the datasets (raw and cleaned) each session holds in the memory manager.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test --sessions 1 2 4 8 --rows 10000
+"""
+import argparse
+import io
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from unittest.mock import patch
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.datasets import numeric_dataset
+from utils.memory import SessionFrames
+
+ROOT = Path(__file__).resolve().parents[1]
+APP_FILE = ROOT / "streamlit_app.py"
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results" / "load_test.json"
+
+PAGES = {
+    "home": "🏠 Home",
+    "load": "📂 Load & Clean Data",
+    "eda": "📊 EDA",
+    "modeling": "🤖 Modeling",
+    "inference": "🔍 Inference",
+}
+
+# AppTest installs a process-wide mock runtime for the duration of each script run and
+# removes it afterwards, so two runs overlapping in time break each other. Script runs are
+# therefore serialized; background jobs and the polling of the other sessions still
+# overlap them, and the time a rerun spends queued counts towards its latency.
+_SCRIPT_LOCK = threading.Lock()
+SERIALIZED_NOTE = ("script reruns are serialized (AppTest runs one script at a time), so latencies at "
+                   "N sessions include queueing behind other sessions and overstate a real server")
+
+@dataclass
+class SessionStats:
+    """Rerun latencies (seconds) of one simulated session, grouped by flow step."""
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: List[str] = field(default_factory=list)
+
+def make_uploads(n_rows: int) -> Dict[str, bytes]:
+    """
+    Build the CSV payloads every simulated session uploads.
+
+    Args:
+        n_rows (int): Rows per dataset.
+    Returns:
+        Dict[str, bytes]: File name to CSV content.
+    """
+    uploads = {}
+    for i, name in enumerate(["sales.csv", "returns.csv"]):
+        rng = np.random.default_rng(i)
+        df = numeric_dataset(n_rows, rng)
+        df["region"] = rng.choice(["north", "south", "east", "west"], size=n_rows)
+        uploads[name] = df.to_csv(index=False).encode("utf-8")
+    return uploads
+
+def fake_file_uploader(uploads: Dict[str, bytes]) -> Callable[..., List[io.BytesIO]]:
+    """
+    Build a stand-in for `st.file_uploader` that always returns the given files.
+
+    Args:
+        uploads (Dict[str, bytes]): File name to content.
+    Returns:
+        Callable[..., List[io.BytesIO]]: The replacement, returning fresh file objects on every call.
+    """
+    def file_uploader(*args: Any, **kwargs: Any) -> List[io.BytesIO]:
+        files = []
+        for name, payload in uploads.items():
+            uploaded_file = io.BytesIO(payload)
+            uploaded_file.name = name
+            files.append(uploaded_file)
+        return files
+
+    return file_uploader
+
+class SimulatedSession:
+    """One analyst clicking through the app."""
+
+    def __init__(self, timeout: float) -> None:
+        self.app = AppTest.from_file(str(APP_FILE), default_timeout=timeout)
+        self.timeout = timeout
+        self.stats = SessionStats()
+
+    def rerun(self, step: str, action: Optional[Callable[[], Any]] = None) -> None:
+        """Apply a widget interaction (if any) and time the resulting rerun."""
+        if action is not None:
+            action()
+        start = time.perf_counter()
+        with _SCRIPT_LOCK:
+            self.app.run()
+        self.stats.latencies[step].append(time.perf_counter() - start)
+        for exception in self.app.exception:
+            self.stats.errors.append(f"{step}: {exception.message}")
+
+    def navigate(self, page: str) -> None:
+        # the navigation options are dicts rendered by their "title"; AppTest resolves a
+        # selectbox value through the widget's format_func, so a dict with the title suffices
+        nav = self.app.sidebar.selectbox[0]
+        self.rerun(f"{page}:open", lambda: nav.set_value({"title": PAGES[page]}))
+
+    def widget(self, kind: str, label: str) -> Any:
+        matches = [w for w in getattr(self.app, kind) if w.label == label]
+        if not matches:
+            raise LookupError(f"No {kind} labelled {label!r} on the page")
+        return matches[0]
+
+    def dataset_bytes(self) -> int:
+        """Bytes of datasets this session holds in the memory manager, in RAM or spilled to disk."""
+        frames = self.app.session_state["dataframes"] if "dataframes" in self.app.session_state else None
+        if not isinstance(frames, SessionFrames):
+            return 0
+        usage = frames.memory_usage()
+        return usage["resident"] + usage["spilled"]
+
+    def wait_for_metric(self, step: str, label: str) -> None:
+        """Rerun until a metric appears, as the page does while a background job runs."""
+        deadline = time.perf_counter() + self.timeout
+        while not any(metric.label == label for metric in self.app.metric):
+            if time.perf_counter() > deadline or self.app.error:
+                self.stats.errors.append(f"{step}: no {label!r} metric before timeout")
+                return
+            time.sleep(0.05)
+            self.rerun(f"{step}:poll")
+
+    def run_flow(self) -> None:
+        """Upload, explore, test and model, timing every rerun."""
+        self.rerun("home:open")
+        # the first visit parses and encodes the uploads, later ones only render the page
+        self.navigate("load")
+        self.rerun("load:dedup", lambda: self.widget("button", "Remove Duplicates").click())
+
+        self.navigate("eda")
+        self.rerun("eda:describe", lambda: self.widget("checkbox", "Show Descriptive Statistics").check())
+        self.rerun("eda:column", lambda: self.widget("selectbox", "Select a column to analyse:").set_value("target"))
+        self.rerun("eda:group_target", lambda: self.widget("selectbox", "Numeric column:").set_value("count"))
+
+        self.navigate("inference")
+        self.rerun("inference:run", lambda: self.widget("button", "Run Test").click())
+        self.wait_for_metric("inference", "p-value")
+
+        self.navigate("modeling")
+        self.rerun("modeling:x2", lambda: self.widget("selectbox", "X_2").set_value("x2"))
+        self.rerun("modeling:y", lambda: self.widget("selectbox", "Y").set_value("count"))
+        self.rerun("modeling:fit", lambda: self.widget("button", "Model Dataset").click())
+        self.wait_for_metric("modeling", "Mean Absolute Error")
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50_ms": float("nan"), "p95_ms": float("nan"), "p99_ms": float("nan")}
+    p50, p95, p99 = np.percentile(np.asarray(values) * 1e3, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+def run_level(n_sessions: int, uploads: Dict[str, bytes], iterations: int, timeout: float) -> Dict[str, Any]:
+    """
+    Run `n_sessions` simulated sessions concurrently, each repeating the flow `iterations` times.
+
+    Args:
+        n_sessions (int): Number of concurrent sessions.
+        uploads (Dict[str, bytes]): CSV payloads to upload.
+        iterations (int): Flow repetitions per session.
+        timeout (float): Seconds allowed per rerun and per background job.
+    Returns:
+        Dict[str, Any]: Latency percentiles, throughput, dataset memory and errors for this level.
+    """
+    sessions = [SimulatedSession(timeout) for _ in range(n_sessions)]
+    barrier = threading.Barrier(n_sessions)
+
+    def drive(session: SimulatedSession) -> None:
+        barrier.wait()
+        for _ in range(iterations):
+            try:
+                session.run_flow()
+            except Exception as e:  # keep the other sessions running
+                session.stats.errors.append(f"flow: {e!r}")
+
+    start = time.perf_counter()
+    with patch("streamlit.file_uploader", fake_file_uploader(uploads)), \
+            ThreadPoolExecutor(max_workers=n_sessions) as pool:
+        list(pool.map(drive, sessions))
+    wall = time.perf_counter() - start
+    # measured per session rather than from process RSS, which never shrinks between levels
+    dataset_mb = [session.dataset_bytes() / 2**20 for session in sessions]
+
+    by_step: Dict[str, List[float]] = defaultdict(list)
+    for session in sessions:
+        for step, values in session.stats.latencies.items():
+            by_step[step].extend(values)
+    reruns = [value for values in by_step.values() for value in values]
+
+    return {
+        "sessions": n_sessions,
+        "reruns": len(reruns),
+        "wall_s": wall,
+        "throughput_rps": len(reruns) / wall if wall else float("nan"),
+        **percentiles(reruns),
+        "dataset_mb_per_session": float(np.mean(dataset_mb)),
+        "dataset_mb_max_session": float(np.max(dataset_mb)),
+        "steps": {step: percentiles(values) for step, values in sorted(by_step.items())},
+        "errors": [error for session in sessions for error in session.stats.errors],
+    }
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure StatsGraph rerun latency under concurrent sessions.")
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 2, 4, 8],
+                        help="Concurrent session counts to test.")
+    parser.add_argument("--rows", type=int, default=10_000,
+                        help="Rows in each uploaded dataset.")
+    parser.add_argument("--iterations", type=int, default=1,
+                        help="Times each session repeats the flow.")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="Seconds allowed per rerun and per background job.")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT,
+                        help="Where to write the JSON report.")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    uploads = make_uploads(args.rows)
+
+    levels = []
+    print(f"note: {SERIALIZED_NOTE}; MB/session is the size of the datasets each session holds")
+    print(f"{'sessions':>8} {'reruns':>7} {'rerun/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'MB/session':>11}")
+    for n_sessions in args.sessions:
+        level = run_level(n_sessions, uploads, args.iterations, args.timeout)
+        levels.append(level)
+        print(f"{level['sessions']:>8} {level['reruns']:>7} {level['throughput_rps']:>8.1f} "
+              f"{level['p50_ms']:>9.1f} {level['p95_ms']:>9.1f} {level['p99_ms']:>9.1f} "
+              f"{level['dataset_mb_per_session']:>11.1f}")
+        for error in level["errors"][:5]:
+            print(f"  ! {error}", file=sys.stderr)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    report = {"rows": args.rows, "iterations": args.iterations, "note": SERIALIZED_NOTE, "levels": levels}
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"report written to {args.output}")
+
+    return 1 if any(level["errors"] for level in levels) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""
+Benchmark suite for the loading, compute, modelling and EDA code paths.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --sizes 1e3 1e4 1e5
+    python -m benchmarks.run_benchmarks --save-baseline
+"""
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datasets import DATASETS, ROW_BYTES
+from pages.EDA import compute_nbins
+from pages.Load_and_Clean import load_dataframe
+from utils.dtypes import compact_dtypes
+from utils.compute import (freedman_draconis_rule,
+                           t_test,
+                           kendall_tau,
+                           kurtosis_test,
+                           spearman_corr,
+                           chi2_test,
+                           fisher_exact_test,
+                           linear_regression,
+                           polynomial_regression,
+                           logistic_regression)
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "latest.json"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_SIZES = [1e3, 1e4, 1e5, 1e6, 1e7]
+
+# a case prepares its inputs from a dataframe (untimed) and returns the callable to time
+CaseSetup = Callable[[pd.DataFrame], Callable[[], Any]]
+
+@dataclass
+class Benchmark:
+    """A single benchmark case and the dataset kinds it runs against."""
+    name: str
+    datasets: Tuple[str, ...]
+    setup: CaseSetup
+
+@dataclass
+class Result:
+    """Timing and memory measurements of one benchmark on one dataset size."""
+    benchmark: str
+    dataset: str
+    rows: int
+    seconds: float
+    median_seconds: float
+    repeats: int
+    peak_mb: float
+
+#---------------------- Benchmark Cases ---------------------------------
+
+def _setup_load_dataframe(df: pd.DataFrame) -> Callable[[], Any]:
+    payload = df.to_csv(index=False).encode("utf-8")
+
+    def run() -> pd.DataFrame:
+        uploaded_file = io.BytesIO(payload)
+        uploaded_file.name = "benchmark.csv"
+        return load_dataframe(uploaded_file)
+
+    return run
+
+def _first_numeric(df: pd.DataFrame) -> pd.Series:
+    return df[df.select_dtypes(include="number").columns[0]]
+
+def _first_text(df: pd.DataFrame) -> pd.Series:
+    return df[df.select_dtypes(include=["object", "category"]).columns[0]]
+
+def _paired_numeric(test: Callable[[pd.Series, pd.Series], Any]) -> CaseSetup:
+    return lambda df: (lambda: test(df["x1"], df["x2"]))
+
+def _paired_categorical(test: Callable[[pd.Series, pd.Series], Any], x: str, y: str) -> CaseSetup:
+    return lambda df: (lambda: test(df[x], df[y]))
+
+def _setup_linear(df: pd.DataFrame) -> Callable[[], Any]:
+    X, y = df[["x1", "x2"]].values, df["target"].values
+    return lambda: linear_regression(df=df, x=X, y=y)
+
+def _setup_polynomial(df: pd.DataFrame) -> Callable[[], Any]:
+    X, y = df["x1"].values, df["target"].values
+    return lambda: polynomial_regression(df=df, x=X, y=y)
+
+def _setup_logistic(df: pd.DataFrame) -> Callable[[], Any]:
+    X, y = df["x1"].values.reshape(-1, 1), df["label"].values
+    return lambda: logistic_regression(df=df, x=X, y=y)
+
+def _setup_info(df: pd.DataFrame) -> Callable[[], Any]:
+    return lambda: df.info(buf=io.StringIO())
+
+NUMERIC = ("numeric", "wide")
+ALL = tuple(DATASETS.keys())
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark("load_dataframe", ALL, _setup_load_dataframe),
+    Benchmark("compact_dtypes", ("categorical", "high_cardinality"), lambda df: (lambda: compact_dtypes(df))),
+    Benchmark("freedman_draconis_rule", NUMERIC, lambda df: (lambda: freedman_draconis_rule(_first_numeric(df)))),
+    Benchmark("compute_nbins", NUMERIC, lambda df: (lambda: compute_nbins(_first_numeric(df)))),
+    Benchmark("t_test", ("numeric",), _paired_numeric(t_test)),
+    Benchmark("kendall_tau", ("numeric",), _paired_numeric(kendall_tau)),
+    Benchmark("kurtosis_test", ("numeric",), _paired_numeric(kurtosis_test)),
+    Benchmark("spearman_corr", ("numeric",), _paired_numeric(spearman_corr)),
+    Benchmark("chi2_test", ("categorical",), _paired_categorical(chi2_test, "region", "segment")),
+    Benchmark("fisher_exact_test", ("categorical",), _paired_categorical(fisher_exact_test, "flag_a", "flag_b")),
+    Benchmark("linear_regression", ("numeric",), _setup_linear),
+    Benchmark("polynomial_regression", ("numeric",), _setup_polynomial),
+    Benchmark("logistic_regression", ("numeric",), _setup_logistic),
+    Benchmark("eda_describe", ALL, lambda df: (lambda: df.describe(include="all"))),
+    Benchmark("eda_missing_summary", ALL, lambda df: (lambda: df.isnull().sum())),
+    Benchmark("eda_info", ALL, _setup_info),
+    Benchmark("eda_value_counts", ("categorical", "high_cardinality"), lambda df: (lambda: _first_text(df).value_counts())),
+    Benchmark("eda_correlation", NUMERIC, lambda df: (lambda: df.select_dtypes(include="number").corr())),
+]
+
+#---------------------- End of Benchmark Cases --------------------------
+
+def measure(func: Callable[[], Any], repeats: int) -> Tuple[float, float, float]:
+    """
+    Time a callable and record its peak traced memory.
+
+    The timed runs are executed without tracemalloc, which would otherwise inflate them;
+    peak memory is measured in one extra traced run.
+
+    Args:
+        func (Callable[[], Any]): The callable to measure.
+        repeats (int): Number of timed runs.
+    Returns:
+        Tuple[float, float, float]: Best time (s), median time (s) and peak memory (MB).
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return min(timings), float(np.median(timings)), peak / 2**20
+
+def run_suite(sizes: List[int],
+              datasets: List[str],
+              name_filter: Optional[str],
+              max_memory_gb: float,
+              seed: int) -> List[Result]:
+    """
+    Run every selected benchmark against every selected dataset kind and size.
+
+    Args:
+        sizes (List[int]): Row counts to generate.
+        datasets (List[str]): Dataset kinds to generate.
+        name_filter (Optional[str]): Only run benchmarks whose name contains this string.
+        max_memory_gb (float): Skip dataset sizes estimated to exceed this size.
+        seed (int): Seed for the synthetic data.
+    Returns:
+        List[Result]: The measurements.
+    """
+    results: List[Result] = []
+    for kind in datasets:
+        selected = [b for b in BENCHMARKS
+                    if kind in b.datasets and (name_filter is None or name_filter in b.name)]
+        if not selected:
+            continue
+
+        for n_rows in sizes:
+            if n_rows * ROW_BYTES[kind] > max_memory_gb * 2**30:
+                print(f"skip {kind} x {n_rows:,}: exceeds --max-memory-gb", file=sys.stderr)
+                continue
+
+            df = DATASETS[kind](n_rows, np.random.default_rng(seed))
+            repeats = 5 if n_rows <= 10_000 else 3 if n_rows <= 100_000 else 1
+
+            for bench in selected:
+                best, median, peak_mb = measure(bench.setup(df), repeats)
+                result = Result(bench.name, kind, n_rows, best, median, repeats, peak_mb)
+                results.append(result)
+                print(f"{bench.name:<24} {kind:<17} {n_rows:>10,} rows  "
+                      f"{best * 1e3:>10.2f} ms  {peak_mb:>9.1f} MB", file=sys.stderr)
+            del df
+
+    return results
+
+def compare(results: List[Result], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compare results against a stored baseline and describe every regression.
+
+    A benchmark regresses when its time or peak memory grows by more than `tolerance`
+    relative to the baseline. Differences below 1 ms / 1 MB are treated as noise.
+
+    Args:
+        results (List[Result]): The current measurements.
+        baseline (Dict[str, Any]): A previously saved results file.
+        tolerance (float): Allowed relative slowdown, e.g. 0.25 for 25%.
+    Returns:
+        List[str]: One message per regression.
+    """
+    previous = {(r["benchmark"], r["dataset"], r["rows"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        old = previous.get((result.benchmark, result.dataset, result.rows))
+        if old is None:
+            continue
+
+        label = f"{result.benchmark} [{result.dataset}, {result.rows:,} rows]"
+        if result.seconds > old["seconds"] * (1 + tolerance) and result.seconds - old["seconds"] > 1e-3:
+            regressions.append(f"{label}: time {old['seconds'] * 1e3:.2f} ms -> {result.seconds * 1e3:.2f} ms")
+        if result.peak_mb > old["peak_mb"] * (1 + tolerance) and result.peak_mb - old["peak_mb"] > 1:
+            regressions.append(f"{label}: peak memory {old['peak_mb']:.1f} MB -> {result.peak_mb:.1f} MB")
+
+    return regressions
+
+def write_results(results: List[Result], path: Path) -> None:
+    """
+    Write measurements and environment metadata to a JSON file.
+
+    Args:
+        results (List[Result]): The measurements.
+        path (Path): Destination file.
+    Returns:
+        None
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "results": [asdict(result) for result in results],
+    }
+    path.write_text(json.dumps(payload, indent=2))
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark statsgraph compute and loading paths.")
+    parser.add_argument("--sizes", nargs="+", type=float, default=DEFAULT_SIZES,
+                        help="Row counts to benchmark (accepts 1e5 notation).")
+    parser.add_argument("--datasets", nargs="+", choices=list(DATASETS.keys()), default=list(DATASETS.keys()),
+                        help="Synthetic dataset kinds to generate.")
+    parser.add_argument("--filter", default=None,
+                        help="Only run benchmarks whose name contains this string.")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT,
+                        help="Where to write the results file.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE,
+                        help="Baseline results file to compare against.")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Also store these results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown before a benchmark is flagged.")
+    parser.add_argument("--max-memory-gb", type=float, default=4.0,
+                        help="Skip dataset sizes estimated to need more memory than this.")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes]
+
+    results = run_suite(sizes, args.datasets, args.filter, args.max_memory_gb, args.seed)
+    write_results(results, args.output)
+    print(f"results written to {args.output}")
+
+    if args.save_baseline:
+        write_results(results, args.baseline)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print("no baseline found, skipping regression check (use --save-baseline to create one)")
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regression(s) against {args.baseline}:")
+        for message in regressions:
+            print(f"  - {message}")
+        return 1
+
+    print(f"no regressions against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
 import streamlit as st
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
+from utils.memory import SessionFrames, memory_sidebar
+from utils.snapshot import snapshot_sidebar
 
 class MultiPager(BaseModel):
     """A class to manage multiple pages in a Streamlit app."""
@@ -30,9 +32,18 @@ class MultiPager(BaseModel):
         # add a button in sidebar to clear session state
         sidebar = st.sidebar
         if sidebar.button("Clear Session State"):
+            if isinstance(st.session_state.get("dataframes"), SessionFrames):
+                st.session_state.dataframes.clear()
+            # these are keyed by dataset name, so a re-uploaded file must not inherit them
+            for cache in ("cleaning_plans", "cleaned_versions", "encoding_reports",
+                          "joins", "group_summaries", "models"):
+                st.session_state.pop(cache, None)
             st.session_state.state = 0
             st.session_state.dataframes = None
             st.rerun()
 
+        memory_sidebar()
+        snapshot_sidebar()
+
         # run page
         page["func"]()
\ No newline at end of file
@@ -1,11 +1,24 @@
 import streamlit as st
 from utils.common import scaffold_page
-from utils.compute import freedman_draconis_rule, sturges_rule
+from utils.compute import (freedman_draconis_rule,
+                           sturges_rule,
+                           factorize_groups,
+                           grouped_summary,
+                           largest_groups)
+from utils.cleaning import cleaned_frame, dataset_version
+from utils.dtypes import (is_numeric_column,
+                          is_categorical_column,
+                          numeric_columns,
+                          categorical_columns)
 import pandas as pd
 import math
 import io
+from typing import Tuple
 import plotly.express as px
 
+# group-by tables and charts show at most this many groups, the largest ones
+MAX_GROUPS_SHOWN = 30
+
 def initial_check() -> None:
     """
     Perform initial checks to ensure prerequisites are met.
@@ -70,10 +83,10 @@ def column_eda(df: pd.DataFrame) -> None:
     col = st.selectbox("Select a column to analyse:", df.columns.tolist())
     store_column_selection(col)
 
-    if df[col].dtype in ["int64", "float64"]:
+    if is_numeric_column(df[col]):
         st.write("📊 Numeric Summary")
         st.write(df[col].describe())
-    elif df[col].dtype in ["object", "category"]:
+    elif is_categorical_column(df[col]):
         st.write("🔤 Categorical Summary")
         st.write(df[col].value_counts())
     else:
@@ -119,7 +132,7 @@ def visualisations(df: pd.DataFrame)-> None:
         col = st.session_state["selected_column"]
         column_data = df[col]
 
-        if column_data.dtype in ["int64", "float64"]:
+        if is_numeric_column(column_data):
             # Histogram
             fig = px.histogram(df.dropna(), x=col, nbins=compute_nbins(column_data), title=f"Histogram of {col}")
             st.plotly_chart(fig, width="stretch")
@@ -128,7 +141,7 @@ def visualisations(df: pd.DataFrame)-> None:
             fig2 = px.box(df.dropna(), y=col, title=f"Box Plot of {col}")
             st.plotly_chart(fig2, width="stretch")
 
-        elif column_data.dtype in ["object", "category"]:
+        elif is_categorical_column(column_data):
             # Bar chart for value counts
             fig = px.bar(column_data.index,
                             y=column_data.values, 
@@ -140,7 +153,7 @@ def visualisations(df: pd.DataFrame)-> None:
             st.error("Column type not supported for visualisations.")
 
     if btn_correlation:
-        numeric_cols = df.select_dtypes(include=["int64", "float64"]).columns
+        numeric_cols = numeric_columns(df)
         if len(numeric_cols) < 2:
             st.error("Not enough numeric columns for correlation heatmap.")
         else:
@@ -149,6 +162,66 @@ def visualisations(df: pd.DataFrame)-> None:
             st.plotly_chart(fig, width="stretch") 
 
 
+def cached_summary(data_choice: str, df: pd.DataFrame, group_col: str,
+                   max_entries: int = 8) -> Tuple[int, pd.DataFrame]:
+    """
+    Summarise every numeric column by a group column once per dataset version, so reruns
+    (such as picking another numeric column) reuse the result.
+
+    Args:
+        data_choice (str): Name of the dataset.
+        df (pd.DataFrame): The cleaned dataset.
+        group_col (str): The column to group by.
+        max_entries (int): Number of summaries kept per session.
+    Returns:
+        Tuple[int, pd.DataFrame]: The number of groups, and the summary of the largest
+            MAX_GROUPS_SHOWN of them.
+    """
+    cache = st.session_state.setdefault("group_summaries", {})
+    cache_key = (data_choice, dataset_version(data_choice), group_col)
+    if cache_key not in cache:
+        groups = factorize_groups(df[group_col])
+        summary = grouped_summary(df, largest_groups(groups, MAX_GROUPS_SHOWN), numeric_columns(df))
+        cache[cache_key] = (len(groups.labels), summary)
+        while len(cache) > max_entries:
+            cache.pop(next(iter(cache)))
+    return cache[cache_key]
+
+def grouped_statistics(df: pd.DataFrame, data_choice: str) -> None:
+    """
+    Break every numeric column down by a categorical column.
+
+    Args:
+        df (pd.DataFrame): The dataframe containing the data.
+        data_choice (str): Name of the dataset.
+    Returns:
+        None
+    """
+    st.subheader("Group-by Summary")
+    cat_cols = categorical_columns(df)
+    num_cols = numeric_columns(df)
+
+    if not cat_cols or not num_cols:
+        st.info("Group-by summaries need at least one categorical and one numeric column.")
+        return
+
+    group_col = st.selectbox("Group by:", cat_cols)
+    n_groups, summary = cached_summary(data_choice, df, group_col)
+    if n_groups > MAX_GROUPS_SHOWN:
+        st.caption(f"{group_col} has {n_groups:,} groups; showing the {MAX_GROUPS_SHOWN} largest.")
+
+    target = st.selectbox("Numeric column:", num_cols)
+    st.write(summary[target])
+
+    target_summary = summary[target].reset_index()
+    fig = px.bar(target_summary, x=group_col, y="mean",
+                 error_y=target_summary["var"] ** 0.5,
+                 title=f"Mean of {target} by {group_col} (± 1 std)")
+    st.plotly_chart(fig, width="stretch")
+
+    with st.expander("Expand to see all numeric columns"):
+        st.write(summary)
+
 def app():
     """
     Renders the page content.
@@ -162,7 +235,7 @@ def app():
         
     df_keys = list(st.session_state["dataframes"].keys())
     data_choice = st.selectbox("Select a dataset for EDA:", df_keys)
-    df = st.session_state["dataframes"][data_choice]
+    df = cleaned_frame(data_choice)
 
     st.markdown(f"### Data Preview: {data_choice}")
     st.write(f"Shape: {df.shape[0]} rows x {df.shape[1]} columns")
@@ -180,5 +253,7 @@ def app():
     
     visualisations(df)
 
+    grouped_statistics(df, data_choice)
+
 if __name__ == "__main__":
     app()
\ No newline at end of file
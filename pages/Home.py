@@ -15,7 +15,7 @@ def app():
         3. **Inference & Hypothesis Testing**  
         4. **Modeling**  
         5. **Visualisation**  
-        6. **Save Results**
+        6. **Save Results** (sidebar → 💾 Snapshots)
 
         👉 Use the sidebar to navigate.
         """
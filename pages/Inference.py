@@ -10,6 +10,10 @@ from utils.compute import (t_test,
                            fisher_exact_test
                            )
 from utils.common import scaffold_page
+from utils.cleaning import cleaned_frame
+from utils.dtypes import is_numeric_column, is_categorical_column
+from utils.jobs import submit_job, job_result, report_progress
+from utils.join import JoinResult, cached_join
 from typing import Callable, Dict, Any, Optional
 
 HypothesisTest =  Callable[[pd.Series, pd.Series], Any]
@@ -85,6 +89,61 @@ def display_metrics(test_select, result):
         if test_select in ["Kendall's Tau", "Spearman Correlation"]:
             st.metric(label="R²", value=f"{result[0]**2: .4f}")
 
+def run_test(test_func: HypothesisTest, x: pd.Series, y: pd.Series) -> Any:
+    """
+    Run a hypothesis test as a background job.
+
+    Args:
+        test_func (HypothesisTest): The test to run.
+        x (pd.Series): Values from the first dataset.
+        y (pd.Series): Values from the second dataset.
+    Returns:
+        Any: The result of the test.
+    """
+    report_progress(0.1, "Running test")
+    return test_func(x, y)
+
+def pair_datasets(df1_key: str, df2_key: str, df1: pd.DataFrame, df2: pd.DataFrame) -> Optional[JoinResult]:
+    """
+    Optionally align the rows of both datasets on key columns.
+
+    Args:
+        df1_key (str): Name of the first dataset.
+        df2_key (str): Name of the second dataset.
+        df1 (pd.DataFrame): The first dataset.
+        df2 (pd.DataFrame): The second dataset.
+    Returns:
+        Optional[JoinResult]: The join result, or None if rows are compared by position.
+    """
+    if not st.checkbox("Pair rows on key columns"):
+        return None
+
+    key_col1, key_col2 = st.columns(2)
+    df1_on = key_col1.multiselect(label="Keys (Dataset 1)", options=list(df1.columns))
+    df2_on = key_col2.multiselect(label="Keys (Dataset 2)", options=list(df2.columns))
+
+    if not df1_on or len(df1_on) != len(df2_on):
+        st.info("Select the same number of key columns for both datasets.")
+        st.stop()
+
+    with st.spinner("Joining datasets..."):
+        join = cached_join(df1_key, df2_key, df1_on, df2_on)
+
+    stats = join.stats()
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric(label="Paired Rows", value=f"{stats['output_rows']:,}", help=f"{stats['strategy']} join")
+    m2.metric(label="Matched (Dataset 1)", value=f"{stats['matched_left']:,}")
+    m3.metric(label="Unmatched (Dataset 1)", value=f"{stats['unmatched_left']:,}")
+    m4.metric(label="Unmatched (Dataset 2)", value=f"{stats['unmatched_right']:,}")
+
+    if stats["output_rows"] == 0:
+        st.error("No rows matched on the selected keys.")
+        st.stop()
+    if stats["output_rows"] > stats["matched_left"]:
+        st.warning("Some keys are duplicated, so rows are paired many-to-many.")
+
+    return join
+
 def app():
     """
     Renders the page content.
@@ -106,7 +165,9 @@ def app():
         st.stop()
 
     df_keys = list(st.session_state["dataframes"].keys())
-    df1, df2 = st.session_state["dataframes"][df_keys[0]], st.session_state["dataframes"][df_keys[1]]
+    df1, df2 = cleaned_frame(df_keys[0]), cleaned_frame(df_keys[1])
+
+    join = pair_datasets(df_keys[0], df_keys[1], df1, df2)
 
     df1_cols = list(df1.columns)
     df2_cols = list(df2.columns)
@@ -127,12 +188,14 @@ def app():
         index=2,
     )
 
-    if df1[df1_col].dtype != df2[df2_col]:
+    # compare kinds rather than exact dtypes: int64 vs float64, or two categoricals with
+    # different categories, can still be tested against each other
+    if is_numeric_column(df1[df1_col]) != is_numeric_column(df2[df2_col]) \
+        or is_categorical_column(df1[df1_col]) != is_categorical_column(df2[df2_col]):
         st.error("Error!! Both columns must have the same data type")
         st.stop()
     
-    dtype = df1[df1_col].dtype
-    test_type = "numerical" if dtype in ["int64", "float64"] else "categorical"
+    test_type = "numerical" if is_numeric_column(df1[df1_col]) else "categorical"
     d_test = available_tests[test_type]
     
     test_options = list(d_test.keys())
@@ -142,18 +205,28 @@ def app():
         index=0,
     )
     
-    x = df1[df1_col]
-    y = df2[df2_col]
+    if join is None:
+        x = df1[df1_col]
+        y = df2[df2_col]
+    else:
+        x, y = join.align(df1[df1_col], df2[df2_col])
 
     if st.button("Run Test"):
         test_func: HypothesisTest = d_test[test_select]
-        result = test_func(x, y)
+        submit_job("inference_job", f"{test_select}: {df1_col} vs {df2_col}",
+                   run_test, test_func, x, y,
+                   context={"df1_col": df1_col, "df2_col": df2_col, "test_type": test_type,
+                            "test_select": test_select, "x": x, "y": y})
+
+    job = job_result("inference_job")
+    if job is not None:
+        ctx = job.context
 
-        # Display metrics            
-        display_metrics(test_select, result)
+        # Display metrics
+        display_metrics(ctx["test_select"], job.result())
 
-        # Plot 
-        plot(df1_col, df2_col, test_type, test_select, x, y)
+        # Plot
+        plot(ctx["df1_col"], ctx["df2_col"], ctx["test_type"], ctx["test_select"], ctx["x"], ctx["y"])
 
 
 if __name__ == "__main__":
@@ -1,7 +1,17 @@
 import streamlit as st
 import pandas as pd
 from utils.common import scaffold_page
-from typing import Any
+from utils.memory import SessionFrames
+from utils.dtypes import compact_dtypes, is_numeric_column
+from utils.cleaning import (CLEANING_ERRORS,
+                            CastType,
+                            DropDuplicates,
+                            DropMissing,
+                            EditRows,
+                            FillMissing,
+                            Filter,
+                            get_plan)
+from typing import Any, Optional
 
 def load_dataframe(uploaded_file: Any) -> pd.DataFrame:
     """
@@ -16,6 +26,162 @@ def load_dataframe(uploaded_file: Any) -> pd.DataFrame:
 def load_tab(tab, df):
     pass
 
+def parse_value(series: pd.Series, text: str) -> Any:
+    """
+    Convert a value typed by the user to the type of the column it applies to.
+
+    Args:
+        series (pd.Series): The column the value is compared with or written to.
+        text (str): The value as typed.
+    Returns:
+        Any: A float for numeric columns, otherwise the text unchanged.
+    """
+    if is_numeric_column(series):
+        return float(text)
+    return text
+
+def new_step(key: str, df: pd.DataFrame) -> Optional[Any]:
+    """
+    Render the inputs of a new cleaning step.
+
+    Args:
+        key (str): Name of the dataset.
+        df (pd.DataFrame): The raw dataset.
+    Returns:
+        Optional[Any]: The configured step, or None if the inputs are invalid.
+    """
+    columns = df.columns.tolist()
+    step_kind = st.selectbox(
+        label="Add a cleaning step",
+        options=["Drop missing values", "Fill missing values", "Cast column type", "Filter rows", "Drop duplicates"],
+        key=f"step_kind_{key}",
+    )
+
+    if step_kind in ["Drop missing values", "Drop duplicates"]:
+        subset = st.multiselect("Columns (all columns if empty)", columns, key=f"step_subset_{key}")
+        return DropMissing(subset=subset or None) if step_kind == "Drop missing values" else DropDuplicates(subset=subset or None)
+
+    col = st.selectbox("Column", columns, key=f"step_col_{key}")
+    try:
+        if step_kind == "Fill missing values":
+            strategy = st.selectbox("Fill with", ["value", "mean", "median", "mode"], key=f"step_strategy_{key}")
+            value = st.text_input("Value", key=f"step_value_{key}") if strategy == "value" else None
+            if value == "":
+                return None
+            return FillMissing(column=col, strategy=strategy,
+                               value=parse_value(df[col], value) if value is not None else None)
+
+        if step_kind == "Cast column type":
+            dtype = st.selectbox("Type", ["int64", "float64", "string", "category", "datetime64[ns]", "bool"],
+                                 key=f"step_dtype_{key}")
+            return CastType(column=col, dtype=dtype)
+
+        op = st.selectbox("Condition", Filter.OPS, key=f"step_op_{key}")
+        if op in ["is missing", "is not missing"]:
+            return Filter(column=col, op=op)
+        value = st.text_input("Value", key=f"step_value_{key}")
+        if value == "":
+            return None
+        return Filter(column=col, op=op, value=parse_value(df[col], value))
+    except ValueError:
+        st.error(f"Please enter a numeric value for {col}.")
+        return None
+
+def encoding_summary(key: str) -> None:
+    """
+    Report the memory saved by compactly encoding the text columns of a dataset at load time.
+
+    Args:
+        key (str): Name of the dataset.
+    Returns:
+        None
+    """
+    report: Optional[pd.DataFrame] = st.session_state.get("encoding_reports", {}).get(key)
+    if report is None or report.empty:
+        return
+
+    before, after = report["before"].sum(), report["after"].sum()
+    st.caption(f"🗜️ Compact encoding of {len(report)} text column(s) saved "
+               f"{(before - after) / 2**20:,.1f} MB ({(before - after) / max(before, 1):.0%}).")
+    with st.expander("Column encodings"):
+        st.dataframe(
+            report.assign(before=report["before"] / 2**20, after=report["after"] / 2**20)
+                  .rename(columns={"before": "Before (MB)", "after": "After (MB)"}),
+            hide_index=True,
+        )
+
+def cleaning_plan(key: str, df: pd.DataFrame) -> None:
+    """
+    Record cleaning steps for a dataset and preview their effect on a sample.
+    The steps are only applied to the full dataset when another page needs it.
+
+    Args:
+        key (str): Name of the dataset.
+        df (pd.DataFrame): The raw dataset.
+    Returns:
+        None
+    """
+    plan = get_plan(key)
+
+    with st.expander(f"Cleaning plan ({len(plan)} steps)", expanded=len(plan) > 0):
+        step = new_step(key, df)
+        if st.button("Add step", key=f"add_step_{key}", disabled=step is None):
+            plan.add(step)
+
+        for i, recorded in enumerate(plan.steps):
+            text_col, btn_col = st.columns([6, 1])
+            text_col.write(f"{i + 1}. {recorded.describe()}")
+            btn_col.button("Remove", key=f"remove_step_{key}_{i}", on_click=plan.remove, args=(i,))
+
+        if not len(plan):
+            return
+
+        optimized = plan.optimized()
+        if optimized != plan.steps:
+            st.caption("Execution order: " + " → ".join(s.describe() for s in optimized))
+
+        st.markdown("**Preview of cleaned data (sample of 1000 rows)**")
+        try:
+            st.dataframe(plan.preview(df), width="stretch", hide_index=True)
+        except CLEANING_ERRORS as e:
+            st.error(f"The cleaning plan cannot be applied: {e}")
+
+def data_editor(key: str, df: pd.DataFrame) -> None:
+    """
+    Show a dataset with its recorded editor changes in an editable table, and record new
+    changes in the cleaning plan instead of rewriting the dataset.
+
+    Args:
+        key (str): Name of the dataset.
+        df (pd.DataFrame): The raw dataset.
+    Returns:
+        None
+    """
+    plan = get_plan(key)
+    displayed = plan.edits.apply(df) if plan.edits else df
+    # show compactly encoded text columns as free text rather than a fixed list of choices
+    text_columns = {col: "string[pyarrow]" for col in displayed.columns
+                    if isinstance(displayed[col].dtype, pd.CategoricalDtype)}
+    if text_columns:
+        displayed = displayed.astype(text_columns)
+    edited_df = st.data_editor(
+        displayed,
+        num_rows="dynamic",
+        hide_index=True,
+        key=key,
+    )
+
+    editor_state = st.session_state.get(key) or {}
+    if not any(editor_state.get(change) for change in ("edited_rows", "added_rows", "deleted_rows")):
+        return
+
+    # the editor's widget id depends on its data, so once the plan changes the editor is shown
+    # the edited data with a fresh widget state and each change is folded in exactly once
+    before = plan.fingerprint()
+    plan.set_edits((plan.edits or EditRows()).combined(EditRows.from_editor(displayed, edited_df, editor_state)))
+    if plan.fingerprint() != before:
+        st.rerun()
+
 def app():
     scaffold_page(
         title="📂 Load and Clean Data",
@@ -23,7 +189,7 @@ def app():
     )
 
     if "dataframes" not in st.session_state or st.session_state["dataframes"] is None:
-        st.session_state["dataframes"] = {}
+        st.session_state["dataframes"] = SessionFrames()
 
     uploaded_files = st.file_uploader(
         label="Upload your dataset (CSV, XLSX):",
@@ -46,7 +212,9 @@ def app():
             key = f"file_{i+1}_{uploaded_file.name}"
             
             if key not in st.session_state["dataframes"]:
-                st.session_state["dataframes"][key] = load_dataframe(uploaded_file)
+                df, report = compact_dtypes(load_dataframe(uploaded_file))
+                st.session_state["dataframes"][key] = df
+                st.session_state.setdefault("encoding_reports", {})[key] = report
 
     if not st.session_state["dataframes"]:
         st.warning("No valid dataframes loaded. Please check your files.")
@@ -81,21 +249,14 @@ def app():
         
     for key, df in st.session_state["dataframes"].items():
         st.markdown(f"### Data Preview: {key}")
+        encoding_summary(key)
         st.button(
             "Remove Duplicates", 
             key=f"remove_dup_{key}",
-            on_click=lambda k=key: st.session_state["dataframes"].update({k: st.session_state["dataframes"][k].drop_duplicates()}),
+            on_click=lambda k=key: get_plan(k).add(DropDuplicates()),
             )
-        columns = df.columns.tolist()
-        edited_df = st.data_editor(
-            df,
-            num_rows="dynamic",
-            hide_index=True,
-            key=key,
-        )
-
-        # Update the dataframe in session state
-        st.session_state["dataframes"][key] = edited_df        
+        cleaning_plan(key, df)
+        data_editor(key, df)
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
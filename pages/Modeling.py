@@ -1,10 +1,18 @@
 import streamlit as st
 import numpy as np
 import plotly.graph_objects as go
+from functools import partial
 from utils.common import scaffold_page
+from utils.cleaning import cleaned_frame
+from utils.dtypes import numeric_columns, categorical_columns
+from utils.jobs import submit_job, job_result, report_progress
 from utils.compute import (linear_regression, 
                            logistic_regression, 
-                           polynomial_regression)
+                           polynomial_regression,
+                           bootstrap_metric_ci,
+                           max_polynomial_degree,
+                           n_polynomial_terms,
+                           MAX_POLYNOMIAL_TERMS)
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import (accuracy_score, 
                              f1_score, 
@@ -16,7 +24,7 @@ from sklearn.preprocessing import LabelEncoder
 
 model_types = {
     "Linear Regression" : linear_regression,
-    # "Polynomial Regression" : polynomial_regression,
+    "Polynomial Regression" : polynomial_regression,
     "Logistic Regression" : logistic_regression,
 }
 
@@ -113,9 +121,7 @@ def evaluate(model, X_train, X_test, y_train, y_test, pred_type):
     if pred_type == "lr":
         evaluations.append(mean_absolute_error(y_true=y_test, y_pred=predictions))
         evaluations.append(np.sqrt(mean_squared_log_error(y_true=y_test, y_pred=predictions)))
-
-        col1.metric(label="Mean Absolute Error", value=f"{evaluations[0]: .4f}")
-        col2.metric(label="Root Mean Squared Log Error", value=f"{evaluations[1]: .4f}")
+        labels = ["Mean Absolute Error", "Root Mean Squared Log Error"]
     else:
         evaluations.append(accuracy_score(y_true=y_test, y_pred=predictions))
         if len(np.unique(y_test)) == 2:
@@ -124,8 +130,14 @@ def evaluate(model, X_train, X_test, y_train, y_test, pred_type):
             f1 = f1_score(y_true=y_test, y_pred=predictions, average="macro")
             
         evaluations.append(f1)
-        col1.metric(label="Accuracy", value=f"{evaluations[0]: .4f}")
-        col2.metric(label="F1 Score", value=f"{evaluations[1]: .4f}")
+        labels = ["Accuracy", "F1 Score"]
+
+    # 95% bootstrap confidence intervals from resampling the test predictions
+    intervals = bootstrap_metric_ci(y_true=y_test, y_pred=predictions, pred_type=pred_type)
+    for col, label, value in zip([col1, col2], labels, evaluations):
+        low, high = intervals[label]
+        col.metric(label=label, value=f"{value: .4f}")
+        col.caption(f"95% CI: [{low: .4f}, {high: .4f}]")
 
     # Scatter plot
     plot_scatter(X_train, y_train, X_test, y_test)
@@ -134,6 +146,27 @@ def evaluate(model, X_train, X_test, y_train, y_test, pred_type):
     if len(np.unique(y_test)) == 2:
         plot_auc(model=model, X_test=X_test, y_test=y_test)
 
+def fit_model(model_tech, df, X, Y):
+    """
+    Split the data and fit a model as a background job.
+
+    Args:
+        model_tech: Modelling function from `model_types`
+        df (pd.DataFrame): The selected dataframe
+        X (np.array): Input data
+        Y (np.array): Output data
+
+    Return:
+        tuple: The fitted model, X_train, X_test, y_train and y_test
+    """
+    report_progress(0.1, "Splitting data")
+    X_train, X_test, y_train, y_test = train_test_split(X, Y, test_size=0.2, random_state=42)
+
+    report_progress(0.3, "Fitting model")
+    model = model_tech(df=df, x=X_train, y=y_train)
+
+    return model, X_train, X_test, y_train, y_test
+
 def app():
     """
     Renders the page content.
@@ -159,7 +192,7 @@ def app():
         options=[key for key in dataframes_dict.keys()]
     )
 
-    df = dataframes_dict[df_select]
+    df = cleaned_frame(df_select)
     model_col, var_col = st.columns(2)
 
     technique = model_col.selectbox(
@@ -168,8 +201,8 @@ def app():
     )
 
     model_tech = model_types[technique]
-    num_cols = df.select_dtypes(include=["int64", "float64"]).columns
-    cat_cols = df.select_dtypes(include=["object", "category"]).columns
+    num_cols = numeric_columns(df)
+    cat_cols = categorical_columns(df)
     pred_type = "lr"
 
     if technique == "Linear Regression":
@@ -226,32 +259,63 @@ def app():
         X = df[x].values.reshape(-1,1)
         Y = df[y].values
         Y = LabelEncoder().fit_transform(y=Y)
-    # TODO: Polynomial Regression
-    # else:
-    #     var_col.info("Select an independent variable and one dependent variable.")
-
-    #     x = var_col.selectbox(
-    #         label="X",
-    #         options=num_cols
-    #     )
-        
-    #     y = var_col.selectbox(
-    #         label="Y",
-    #         options=list(num_cols)
-    #     )
-
-    #     if x == y:
-    #         st.error("There must not be same columns")
-    #         st.stop()
-        
-    #     X = df[x].values.reshape(-1,1)
-    #     Y = df[y].values
+    else:
+        var_col.info("Select one or more independent variables and one dependent variable. "
+                     "The polynomial degree is chosen by cross-validation.")
 
-    if st.button("Model Dataset"):
-        X_train, X_test, y_train, y_test = train_test_split(X, Y, test_size=0.2, random_state=42)
-        model = model_tech(df=df, x=X_train, y=y_train)
+        x = var_col.multiselect(
+            label="X",
+            options=list(num_cols),
+            default=list(num_cols[:1]),
+        )
+
+        y = var_col.selectbox(
+            label="Y",
+            options=list(num_cols)
+        )
+
+        if not x:
+            st.error("Select at least one independent variable")
+            st.stop()
 
-        evaluate(model=model, X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test, pred_type=pred_type)
+        # the number of terms grows combinatorially with features and degree
+        degree_limit = max_polynomial_degree(len(x))
+        if degree_limit == 0:
+            st.error(f"Too many independent variables: even a linear fit would exceed "
+                     f"{MAX_POLYNOMIAL_TERMS:,} terms.")
+            st.stop()
+        if degree_limit < 8:
+            var_col.caption(f"With {len(x)} variables the degree is limited to {degree_limit} "
+                            f"({n_polynomial_terms(len(x), degree_limit):,} terms).")
+
+        max_degree = var_col.slider(
+            label="Maximum degree",
+            min_value=1,
+            max_value=degree_limit,
+            value=min(4, degree_limit),
+        ) if degree_limit > 1 else 1
+
+        if y in x:
+            st.error("There must not be same columns")
+            st.stop()
+
+        X = df[x].values
+        Y = df[y].values
+        model_tech = partial(polynomial_regression, max_degree=max_degree)
+
+    if st.button("Model Dataset"):
+        submit_job("modeling_job", f"{technique} on {df_select}",
+                   fit_model, model_tech, df, X, Y,
+                   context={"pred_type": pred_type})
+
+    job = job_result("modeling_job")
+    if job is not None:
+        model, X_train, X_test, y_train, y_test = job.result()
+        # keep fitted models so they can be saved in a session snapshot
+        st.session_state.setdefault("models", {})[job.label] = {"id": job.id, "model": model}
+        if hasattr(model, "degree_"):
+            st.metric(label="Selected Polynomial Degree", value=model.degree_)
+        evaluate(model=model, X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test, pred_type=job.context["pred_type"])
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
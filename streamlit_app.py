@@ -1,6 +1,7 @@
 import streamlit as st
 from multipager import MultiPager
 from pages import Load_and_Clean, EDA, Inference, Modeling, Home
+from utils.memory import SessionFrames
 from typing import Dict, Callable
 
 AppFunc = Callable[[], None]
@@ -42,7 +43,8 @@ if __name__ == "__main__":
     
     pages = add_pages(pages, page_info=page_info)
 
-    st.session_state.setdefault("dataframes", {})
+    if "dataframes" not in st.session_state:
+        st.session_state["dataframes"] = SessionFrames()
     st.session_state.setdefault("state", 0)  # 0: Initial, 1: Data Loaded
 
     pages.run()
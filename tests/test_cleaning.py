@@ -0,0 +1,174 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.cleaning import (ROW_FILTERS,
+                            CastType,
+                            CleaningPlan,
+                            DropDuplicates,
+                            DropMissing,
+                            EditRows,
+                            FillMissing,
+                            Filter)
+from utils.dtypes import compact_dtypes
+
+def raw_frame() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n_rows = 400
+    df = pd.DataFrame({
+        "key": rng.integers(0, 20, n_rows),
+        "x": rng.normal(size=n_rows).round(1),
+        "y": rng.integers(0, 5, n_rows).astype(float),
+        "label": rng.choice(["a", "b", "c"], n_rows).astype(object),
+    })
+    df.loc[rng.random(n_rows) < 0.15, "x"] = np.nan
+    df.loc[rng.random(n_rows) < 0.15, "label"] = None
+    return pd.concat([df, df.sample(50, random_state=1)], ignore_index=True)
+
+def run_in_order(steps, df: pd.DataFrame) -> pd.DataFrame:
+    """Apply the steps one at a time in recorded order, without any optimization."""
+    out = df
+    for step in steps:
+        if isinstance(step, ROW_FILTERS):
+            out = out[step.mask(out).to_numpy()]
+        elif isinstance(step, (DropDuplicates, EditRows)):
+            out = step.apply(out)
+        else:
+            out = out.assign(**{step.column: step.transform(out[step.column])})
+    return out
+
+PLANS = {
+    "filter after full dedup": [DropDuplicates(), Filter("y", ">", 1)],
+    "filter on dedup subset": [DropDuplicates(subset=["key"]), Filter("key", "<", 10)],
+    "filter outside dedup subset": [DropDuplicates(subset=["key"]), Filter("y", ">=", 2)],
+    "filter after mean fill": [FillMissing("x", "mean"), Filter("y", "==", 3)],
+    "filter on filled column": [FillMissing("x", "value", 0.0), Filter("x", ">", -0.5)],
+    "filter after fill of other column": [FillMissing("label", "value", "z"), Filter("y", "!=", 0)],
+    "filter on cast column": [CastType("y", "int64"), Filter("y", ">", 2)],
+    "drop missing after fill": [FillMissing("x", "median"), DropMissing()],
+    "drop missing on filled subset": [FillMissing("x", "value", 1.0), DropMissing(subset=["x"])],
+    "filter after edits": [EditRows(cells=[[0, "y", 9.0], [3, "x", None]], deleted=[1, 2],
+                                    added=[[900, {"key": 1, "x": 0.3, "y": 4.0, "label": "c"}]]),
+                           Filter("y", ">", 3)],
+    "mixed": [DropDuplicates(), FillMissing("x", "mean"), CastType("key", "float64"),
+              Filter("label", "==", "a"), FillMissing("label", "mode"), Filter("key", "<=", 12.0),
+              DropMissing(subset=["label"])],
+}
+
+@pytest.mark.parametrize("steps", PLANS.values(), ids=PLANS.keys())
+def test_optimized_plan_matches_recorded_order(steps):
+    df = raw_frame()
+    pd.testing.assert_frame_equal(CleaningPlan(steps).execute(df), run_in_order(steps, df))
+
+@pytest.mark.parametrize("steps", PLANS.values(), ids=PLANS.keys())
+def test_column_pruning_matches_full_run(steps):
+    df = raw_frame()
+    plan = CleaningPlan(steps)
+    pd.testing.assert_frame_equal(plan.execute(df, columns=["x", "label"]), plan.execute(df)[["x", "label"]])
+
+def random_step(rng: np.random.Generator):
+    column = rng.choice(["key", "x", "y", "label"])
+    kind = rng.integers(0, 5)
+    if kind == 0:
+        return DropDuplicates(subset=None if rng.random() < 0.5 else [column])
+    if kind == 1:
+        return FillMissing(column, rng.choice(["value", "mode"]) if column == "label" else rng.choice(["value", "mean", "median"]),
+                           value="z" if column == "label" else 0.0)
+    if kind == 2:
+        return DropMissing(subset=None if rng.random() < 0.5 else [column])
+    if kind == 3 and column != "label":
+        return CastType(column, "float64")
+    if column == "label":
+        return Filter(column, rng.choice(["==", "!=", "is missing", "is not missing"]), "a")
+    return Filter(column, rng.choice(["==", "!=", ">", ">=", "<", "<="]), 1.0)
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_plans_match_recorded_order(seed):
+    rng = np.random.default_rng(seed)
+    steps = [random_step(rng) for _ in range(rng.integers(2, 7))]
+    df = raw_frame()
+    pd.testing.assert_frame_equal(CleaningPlan(steps).execute(df), run_in_order(steps, df))
+
+def test_filters_move_before_expensive_steps_only_when_safe():
+    dedup, mean_fill = DropDuplicates(subset=["key"]), FillMissing("x", "mean")
+    key_filter, x_filter = Filter("key", "<", 10), Filter("x", ">", 0.0)
+    plan = CleaningPlan([mean_fill, dedup, key_filter, x_filter])
+    # the key filter moves before the dedup on "key"; neither crosses the mean fill,
+    # and the filter on "x" stays after the dedup because "x" is outside its subset
+    assert plan.optimized() == [mean_fill, key_filter, dedup, x_filter]
+
+def test_edits_stay_first():
+    edits = EditRows(cells=[[0, "x", 1.0]])
+    plan = CleaningPlan([DropDuplicates()])
+    plan.set_edits(edits)
+    plan.add(Filter("y", ">", 0.0))
+    assert plan.edits == edits
+    assert plan.optimized()[0] == edits
+    plan.set_edits(None)
+    assert plan.edits is None and len(plan) == 2
+
+def test_editor_changes_fold_into_one_step():
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+    # first round: edit row 0, delete row 2, add one row (the editor appends it to its output)
+    edited = pd.DataFrame({"a": [10, 2, 4], "b": ["x", "y", "w"]}, index=[0, 1, 3])
+    first = EditRows.from_editor(df, edited, {"edited_rows": {"0": {"a": 10}}, "deleted_rows": [2],
+                                              "added_rows": [{"a": 4, "b": "w"}]})
+    assert first == EditRows(cells=[[0, "a", 10]], deleted=[2], added=[[3, {"a": 4, "b": "w"}]])
+
+    # second round, on the edited data: change the added row and delete row 1
+    shown = first.apply(df)
+    edited = pd.DataFrame({"a": [10, 5], "b": ["x", "w"]}, index=[0, 3])
+    second = EditRows.from_editor(shown, edited, {"edited_rows": {"2": {"a": 5}}, "deleted_rows": [1], "added_rows": []})
+    combined = first.combined(second)
+
+    expected = pd.DataFrame({"a": [10, 5], "b": ["x", "w"]}, index=[0, 3])
+    pd.testing.assert_frame_equal(combined.apply(df), expected)
+    restored = CleaningPlan.from_dict(json.loads(json.dumps(CleaningPlan([combined]).to_dict())))
+    pd.testing.assert_frame_equal(restored.execute(df), expected)
+
+@pytest.mark.parametrize("values, expected", [
+    (["True", "false", " YES ", "no", "1", "x", None], [True, False, True, False, True, None, None]),
+    ([1.0, 0.0, 2.0, np.nan], [True, False, None, None]),
+    ([True, False], [True, False]),
+], ids=["text", "numbers", "bools"])
+def test_cast_to_bool_only_reads_recognised_values(values, expected):
+    cast = CastType("flag", "bool").transform(pd.Series(values))
+    pd.testing.assert_series_equal(cast, pd.Series(expected, dtype="boolean"))
+
+def compacted_frame() -> pd.DataFrame:
+    df, report = compact_dtypes(raw_frame())
+    assert report.set_index("column").loc["label", "encoding"] == "category"
+    return df
+
+@pytest.mark.parametrize("op", Filter.OPS)
+def test_filter_on_compacted_column_matches_text_column(op):
+    step = Filter("label", op, "b")
+    expected = step.mask(raw_frame())
+    pd.testing.assert_series_equal(step.mask(compacted_frame()), expected, check_names=False)
+
+@pytest.mark.parametrize("step", [FillMissing("label", "value", "unknown"), FillMissing("label", "mode")],
+                         ids=["value", "mode"])
+def test_fill_on_compacted_column(step):
+    filled = CleaningPlan([step]).execute(compacted_frame())["label"]
+    assert isinstance(filled.dtype, pd.CategoricalDtype)
+    expected = CleaningPlan([step]).execute(raw_frame())["label"]
+    pd.testing.assert_series_equal(filled.astype(object), expected)
+
+def test_editor_changes_on_compacted_column():
+    df = compacted_frame().head(5)
+    edits = EditRows(cells=[[0, "label", "new"]], added=[[500, {"key": 1, "x": 0.0, "y": 1.0, "label": "added"}]])
+    out = edits.apply(df)
+    assert isinstance(out["label"].dtype, pd.CategoricalDtype)
+    assert out.loc[0, "label"] == "new" and out.loc[500, "label"] == "added"
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_plans_on_compacted_columns(seed):
+    rng = np.random.default_rng(seed)
+    steps = [random_step(rng) for _ in range(rng.integers(2, 7))]
+    expected = run_in_order(steps, raw_frame())
+    result = CleaningPlan(steps).execute(compacted_frame())
+    # compare the categorical labels as text, with the same missing-value marker on both sides
+    as_text = lambda df: df.assign(label=df["label"].astype(object).where(df["label"].notna(), None))
+    pd.testing.assert_frame_equal(as_text(result), as_text(expected))
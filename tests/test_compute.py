@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import accuracy_score, f1_score, mean_absolute_error, mean_squared_log_error
+from sklearn.preprocessing import PolynomialFeatures
+
+import utils.compute
+from utils.compute import (PolynomialGram,
+                           PolynomialRegression,
+                           bootstrap_metric_ci,
+                           factorize_groups,
+                           grouped_summary,
+                           largest_groups)
+
+def polynomial_data(n_rows: int = 2000, n_features: int = 2, noise: float = 0.1, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(-2, 2, size=(n_rows, n_features))
+    y = 1.0 + x[:, 0] - 2 * x[:, 0] ** 2 + 0.5 * x[:, 0] * x[:, -1] + 0.3 * x[:, -1] ** 3
+    return x, y + noise * rng.normal(size=n_rows)
+
+def test_polynomial_matches_sklearn():
+    x, y = polynomial_data()
+    model = PolynomialRegression(degree=3).fit(x, y)
+    expansion = PolynomialFeatures(degree=3)
+    reference = LinearRegression().fit(expansion.fit_transform(x), y)
+    np.testing.assert_allclose(model.predict(x), reference.predict(expansion.transform(x)), atol=1e-6)
+
+def test_cross_validation_picks_the_true_degree():
+    x, y = polynomial_data(n_rows=5000, noise=0.05)
+    model = PolynomialRegression(max_degree=5).fit(x, y)
+    assert model.degree_ == 3
+    assert set(model.cv_scores_) == {1, 2, 3, 4, 5}
+
+def test_chunked_gram_matches_single_pass():
+    x, y = polynomial_data(n_rows=1000, n_features=3)
+    folds = np.random.default_rng(1).integers(0, 4, size=len(y))
+    whole = PolynomialGram(n_features=3, max_degree=3, n_folds=4)
+    whole.update(x, y, folds)
+    chunked = PolynomialGram(n_features=3, max_degree=3, n_folds=4)
+    for start in range(0, len(y), 77):
+        chunked.update(x[start:start + 77], y[start:start + 77], folds[start:start + 77])
+    np.testing.assert_allclose(chunked.gram, whole.gram)
+    np.testing.assert_allclose(chunked.xty, whole.xty)
+    np.testing.assert_allclose(chunked.yty, whole.yty)
+    np.testing.assert_array_equal(chunked.counts, np.bincount(folds, minlength=4))
+
+def test_small_chunks_give_the_same_fit():
+    x, y = polynomial_data()
+    default = PolynomialRegression(max_degree=4).fit(x, y)
+    # room for only a handful of rows of the degree-4 expansion per chunk
+    small = PolynomialRegression(max_degree=4, chunk_bytes=1024).fit(x, y)
+    assert small.degree_ == default.degree_
+    np.testing.assert_allclose(small.coef_, default.coef_, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(small.predict(x), default.predict(x), rtol=1e-8, atol=1e-10)
+
+@pytest.mark.parametrize("column", ["x", "y"])
+@pytest.mark.parametrize("bad", [np.nan, np.inf])
+def test_non_finite_input_is_rejected(column, bad):
+    x, y = polynomial_data(n_rows=100)
+    if column == "x":
+        x[5, 1] = bad
+    else:
+        y[5] = bad
+    with pytest.raises(ValueError, match="NaN or infinity"):
+        PolynomialRegression().fit(x, y)
+
+def test_too_many_terms_is_rejected():
+    x = np.zeros((10, 30))
+    with pytest.raises(ValueError, match="terms"):
+        PolynomialRegression(degree=4).fit(x, np.zeros(10))
+
+def grouped_data(seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_rows = 300
+    df = pd.DataFrame({"group": rng.choice(list("abcdefg"), n_rows).astype(object),
+                       "value": rng.normal(size=n_rows)})
+    df.loc[rng.random(n_rows) < 0.1, "group"] = None
+    df.loc[rng.random(n_rows) < 0.1, "value"] = np.nan
+    # "f" keeps a single value and "g" has no values at all
+    df.loc[df["group"] == "f", "value"] = np.nan
+    df.loc[df.index[df["group"] == "f"][0], "value"] = 1.5
+    df.loc[df["group"] == "g", "value"] = np.nan
+    return df
+
+@pytest.mark.parametrize("seed", range(5))
+def test_grouped_summary_matches_pandas(seed):
+    df = grouped_data(seed)
+    summary = grouped_summary(df, factorize_groups(df["group"]), ["value"])["value"]
+    grouped = df.groupby("group")["value"]
+    expected = pd.DataFrame({"count": grouped.count(), "mean": grouped.mean(), "var": grouped.var(),
+                             "25%": grouped.quantile(0.25), "50%": grouped.quantile(0.5),
+                             "75%": grouped.quantile(0.75)})
+    pd.testing.assert_frame_equal(summary, expected, check_dtype=False, check_names=False)
+    assert summary.loc["f", "count"] == 1 and np.isnan(summary.loc["f", "var"])
+    assert summary.loc["g", "count"] == 0 and summary.loc["g"].drop("count").isna().all()
+
+def test_largest_groups_keep_their_statistics():
+    df = grouped_data(0)
+    groups = factorize_groups(df["group"])
+    full = grouped_summary(df, groups, ["value"])
+    largest = largest_groups(groups, 3)
+    assert list(largest.labels) == sorted(largest.labels)
+    assert sorted(largest.sizes) == sorted(groups.sizes)[-3:]
+    pd.testing.assert_frame_equal(grouped_summary(df, largest, ["value"]), full.loc[largest.labels])
+
+INDEX_SETS = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
+    [0, 0, 0, 3, 3, 5, 9, 9, 9, 9],
+    [2, 2, 4, 4, 6, 6, 8, 8, 1, 1],
+    [7, 7, 7, 7, 7, 7, 7, 7, 7, 7],
+]
+
+def resample_metrics(monkeypatch, y_true, y_pred, pred_type, idx):
+    # a single resample with known indices: both bounds of every interval are its metric
+    monkeypatch.setattr(utils.compute, "_bootstrap_batches", lambda n, n_resamples, rng: iter([np.array([idx])]))
+    intervals = bootstrap_metric_ci(y_true, y_pred, pred_type, n_resamples=1)
+    assert all(low == high for low, high in intervals.values())
+    return {name: low for name, (low, _) in intervals.items()}
+
+@pytest.mark.parametrize("idx", INDEX_SETS)
+def test_bootstrap_regression_metrics_match_sklearn(monkeypatch, idx):
+    y_true = np.array([1.0, 2.5, 0.0, 4.0, 3.0, 7.5, 0.5, 2.0, 9.0, 1.5])
+    y_pred = np.array([1.5, 2.0, 0.3, 3.0, 3.5, 6.0, 0.0, 2.5, 8.0, 1.0])
+    metrics = resample_metrics(monkeypatch, y_true, y_pred, "lr", idx)
+    assert metrics["Mean Absolute Error"] == pytest.approx(mean_absolute_error(y_true[idx], y_pred[idx]))
+    assert metrics["Root Mean Squared Log Error"] == pytest.approx(
+        np.sqrt(mean_squared_log_error(y_true[idx], y_pred[idx])))
+
+@pytest.mark.parametrize("idx", INDEX_SETS)
+@pytest.mark.parametrize("y_true, y_pred", [
+    ([0, 1, 1, 0, 1, 0, 0, 1, 1, 0], [0, 1, 0, 0, 1, 1, 0, 1, 0, 0]),
+    # the positive label is 1 even when it is not the largest label
+    ([1, 2, 2, 1, 1, 2, 2, 1, 2, 2], [1, 2, 1, 1, 2, 2, 2, 1, 2, 1]),
+], ids=["0-1", "1-2"])
+def test_bootstrap_binary_metrics_match_sklearn(monkeypatch, idx, y_true, y_pred):
+    y_true, y_pred = np.array(y_true), np.array(y_pred)
+    metrics = resample_metrics(monkeypatch, y_true, y_pred, "logistic", idx)
+    assert metrics["Accuracy"] == pytest.approx(accuracy_score(y_true[idx], y_pred[idx]))
+    assert metrics["F1 Score"] == pytest.approx(f1_score(y_true[idx], y_pred[idx], zero_division=0))
+
+@pytest.mark.parametrize("idx", INDEX_SETS)
+def test_bootstrap_macro_f1_matches_sklearn(monkeypatch, idx):
+    # some resamples miss labels entirely; macro F1 averages over the labels present
+    y_true = np.array(["a", "b", "c", "a", "b", "c", "a", "b", "c", "d"])
+    y_pred = np.array(["a", "b", "b", "a", "c", "c", "b", "b", "a", "d"])
+    metrics = resample_metrics(monkeypatch, y_true, y_pred, "logistic", idx)
+    assert metrics["Accuracy"] == pytest.approx(accuracy_score(y_true[idx], y_pred[idx]))
+    assert metrics["F1 Score"] == pytest.approx(f1_score(y_true[idx], y_pred[idx], average="macro"))
+
+@pytest.mark.parametrize("pred_type", ["lr", "logistic"])
+def test_bootstrap_interval_contains_point_estimate(pred_type):
+    rng = np.random.default_rng(0)
+    if pred_type == "lr":
+        y_true = rng.gamma(2.0, size=500)
+        y_pred = np.abs(y_true + rng.normal(scale=0.5, size=500))
+        points = {"Mean Absolute Error": mean_absolute_error(y_true, y_pred),
+                  "Root Mean Squared Log Error": np.sqrt(mean_squared_log_error(y_true, y_pred))}
+    else:
+        y_true = rng.integers(0, 2, 500)
+        y_pred = np.where(rng.random(500) < 0.8, y_true, 1 - y_true)
+        points = {"Accuracy": accuracy_score(y_true, y_pred), "F1 Score": f1_score(y_true, y_pred)}
+    intervals = bootstrap_metric_ci(y_true, y_pred, pred_type)
+    for name, point in points.items():
+        low, high = intervals[name]
+        assert low < point < high
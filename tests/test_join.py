@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.join import choose_strategy, join_on_keys
+
+STRATEGIES = ["hash", "sort-merge"]
+
+def merged_pairs(left: pd.DataFrame, right: pd.DataFrame, left_on, right_on) -> np.ndarray:
+    """Matched (left, right) row positions from pd.merge, where missing keys never match."""
+    left = left[left_on].assign(_left=np.arange(len(left))).dropna(subset=left_on)
+    right = right[right_on].assign(_right=np.arange(len(right))).dropna(subset=right_on)
+    merged = left.merge(right, left_on=left_on, right_on=right_on)
+    pairs = merged[["_left", "_right"]].to_numpy(dtype=np.int64).reshape(-1, 2)
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+def assert_matches_merge(left, right, left_on, right_on, strategy):
+    result = join_on_keys(left, right, left_on, right_on, strategy=strategy)
+    assert result.strategy == strategy
+    pairs = np.column_stack([result.left_index, result.right_index]).astype(np.int64).reshape(-1, 2)
+    np.testing.assert_array_equal(pairs, merged_pairs(left, right, left_on, right_on))
+    return result
+
+def random_side(rng: np.random.Generator, n_rows: int) -> pd.DataFrame:
+    df = pd.DataFrame({"a": rng.integers(0, 6, n_rows).astype(float),
+                       "b": rng.choice(["x", "y", "z"], n_rows).astype(object)})
+    df.loc[rng.random(n_rows) < 0.1, "a"] = np.nan
+    df.loc[rng.random(n_rows) < 0.1, "b"] = None
+    return df
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+@pytest.mark.parametrize("seed", range(10))
+def test_multi_column_many_to_many_join_matches_merge(strategy, seed):
+    rng = np.random.default_rng(seed)
+    left, right = random_side(rng, 60), random_side(rng, 40)
+    result = assert_matches_merge(left, right, ["a", "b"], ["a", "b"], strategy)
+    # keys repeat on both sides, so some rows must match several rows of the other side
+    assert result.output_rows > len(np.unique(result.left_index))
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_missing_keys_never_match(strategy):
+    left = pd.DataFrame({"k": [1.0, np.nan, 2.0], "s": ["a", "b", None]})
+    right = pd.DataFrame({"k": [np.nan, 1.0, 2.0], "s": ["b", "a", None]})
+    result = join_on_keys(left, right, ["k"], ["k"], strategy=strategy)
+    assert list(zip(result.left_index, result.right_index)) == [(0, 1), (2, 2)]
+    assert join_on_keys(left, right, ["s"], ["s"], strategy=strategy).output_rows == 2
+    assert join_on_keys(left, right, ["k", "s"], ["k", "s"], strategy=strategy).output_rows == 1
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+@pytest.mark.parametrize("empty_side", ["left", "right", "both"])
+def test_empty_sides(strategy, empty_side):
+    left = pd.DataFrame({"k": [1, 2, 2]})
+    right = pd.DataFrame({"k": [2, 3]})
+    if empty_side in ("left", "both"):
+        left = left.iloc[:0]
+    if empty_side in ("right", "both"):
+        right = right.iloc[:0]
+    result = join_on_keys(left, right, ["k"], ["k"], strategy=strategy)
+    assert result.output_rows == 0
+    assert result.stats()["unmatched_left"] == len(left) and result.stats()["unmatched_right"] == len(right)
+
+# 4.5 has no integer match, which is what pd.merge warns about
+@pytest.mark.filterwarnings("ignore:You are merging on int and float columns")
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_int_keys_match_float_keys(strategy):
+    left = pd.DataFrame({"id": np.array([1, 2, 3, 3], dtype=np.int64)})
+    right = pd.DataFrame({"key": [3.0, 1.0, 4.5, np.nan]})
+    assert_matches_merge(left, right, ["id"], ["key"], strategy)
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_categorical_keys_with_different_categories(strategy):
+    left = pd.DataFrame({"c": pd.Categorical(["b", "a", None, "c"], categories=["a", "b", "c"])})
+    right = pd.DataFrame({"c": pd.Categorical(["c", "b", "d", "b"], categories=["d", "c", "b"])})
+    result = join_on_keys(left, right, ["c"], ["c"], strategy=strategy)
+    assert list(zip(result.left_index, result.right_index)) == [(0, 1), (0, 3), (3, 0)]
+    expected = merged_pairs(left.astype(object), right.astype(object), ["c"], ["c"])
+    np.testing.assert_array_equal(np.column_stack([result.left_index, result.right_index]), expected)
+
+@pytest.mark.parametrize("left_rows, right_rows", [(200, 50), (50, 200)])
+def test_hash_join_builds_on_either_side(left_rows, right_rows):
+    rng = np.random.default_rng(3)
+    assert_matches_merge(random_side(rng, left_rows), random_side(rng, right_rows), ["a"], ["a"], "hash")
+
+def test_strategy_choice():
+    assert choose_strategy(1_000, 5_000_000) == "hash"
+    assert choose_strategy(2_000_000, 3_000_000) == "sort-merge"
+    with pytest.raises(ValueError):
+        join_on_keys(pd.DataFrame({"k": [1]}), pd.DataFrame({"k": [1]}), ["k"], ["k"], strategy="nested-loop")
+    with pytest.raises(ValueError):
+        join_on_keys(pd.DataFrame({"k": [1]}), pd.DataFrame({"k": [1]}), ["k"], [])
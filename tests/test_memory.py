@@ -0,0 +1,148 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.memory import MemoryManager, SessionFrames, estimate_nbytes
+
+def frame(seed: int, n_rows: int = 1000) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"x": rng.normal(size=n_rows),
+                         "label": pd.Categorical(rng.choice(["a", "b"], n_rows)),
+                         "id": pd.array(rng.choice(["p", "q", "r"], n_rows), dtype="string[pyarrow]")})
+
+@pytest.fixture
+def manager(tmp_path) -> MemoryManager:
+    # room for two of the test frames
+    return MemoryManager(budget_bytes=int(2.5 * estimate_nbytes(frame(0))), spill_parent=str(tmp_path))
+
+def spill_files(manager: MemoryManager):
+    return sorted(manager.spill_dir.iterdir())
+
+def states(manager: MemoryManager, owner: str):
+    return {key: entry.state for (entry_owner, key), entry in manager._entries.items() if entry_owner == owner}
+
+def test_least_recently_used_frames_spill_within_budget(manager):
+    for i in range(3):
+        manager.put("s", f"d{i}", frame(i))
+    assert states(manager, "s") == {"d0": "spilled", "d1": "resident", "d2": "resident"}
+    assert manager.usage()["resident"] <= manager.budget_bytes
+    assert len(spill_files(manager)) == 1
+
+    # reading d0 brings it back and pushes out d1, now the least recently used
+    pd.testing.assert_frame_equal(manager.get("s", "d0"), frame(0))
+    assert states(manager, "s") == {"d0": "resident", "d1": "spilled", "d2": "resident"}
+    assert manager.usage()["resident"] <= manager.budget_bytes
+    assert len(spill_files(manager)) == 1
+
+def test_remove_and_release_delete_spill_files(manager):
+    for i in range(4):
+        manager.put("a", f"d{i}", frame(i))
+    manager.put("b", "d", frame(9))
+    assert len(spill_files(manager)) == 3
+    manager.remove("a", "d0")
+    assert len(spill_files(manager)) == 2
+    manager.release("a")
+    assert spill_files(manager) == [] and states(manager, "a") == {}
+    pd.testing.assert_frame_equal(manager.get("b", "d"), frame(9))
+
+class Blocker:
+    """Wraps a function so that its first call waits until released; later calls go straight through."""
+
+    def __init__(self, func):
+        self.func, self.started, self.release = func, threading.Event(), threading.Event()
+        self._first = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        if self._first.acquire(blocking=False):
+            self.started.set()
+            assert self.release.wait(10)
+        return self.func(*args, **kwargs)
+
+def start(target) -> threading.Thread:
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+@pytest.mark.parametrize("action", ["remove", "release", "get"])
+def test_race_with_spilling(manager, monkeypatch, action):
+    manager.put("s", "d0", frame(0))
+    manager.put("s", "d1", frame(1))
+    blocker = Blocker(pd.DataFrame.to_pickle)
+    # a plain function, so that it binds to the frame like the method it replaces
+    monkeypatch.setattr(pd.DataFrame, "to_pickle", lambda df, *args, **kwargs: blocker(df, *args, **kwargs))
+
+    # the third frame pushes d0 out; its spill waits in the writer thread
+    writer = start(lambda: manager.put("s", "d2", frame(2)))
+    assert blocker.started.wait(10)
+    assert states(manager, "s")["d0"] == "spilling"
+    if action == "remove":
+        manager.remove("s", "d0")
+    elif action == "release":
+        manager.release("s")
+    else:
+        # still in RAM, so it is returned and kept resident; d1 is spilled in its place
+        pd.testing.assert_frame_equal(manager.get("s", "d0"), frame(0))
+        assert states(manager, "s")["d1"] == "spilled"
+    blocker.release.set()
+    writer.join(10)
+
+    # the file written for d0 is discarded in every case
+    if action == "get":
+        assert states(manager, "s")["d0"] == "resident"
+        assert spill_files(manager) == [manager._entries[("s", "d1")].path]
+    else:
+        assert spill_files(manager) == [] and "d0" not in states(manager, "s")
+
+@pytest.mark.parametrize("action", ["remove", "release"])
+def test_race_with_loading(manager, monkeypatch, action):
+    for i in range(3):
+        manager.put("s", f"d{i}", frame(i))
+    assert states(manager, "s")["d0"] == "spilled"
+    blocker = Blocker(pd.read_pickle)
+    monkeypatch.setattr(pd, "read_pickle", blocker)
+
+    result = {}
+    reader = start(lambda: result.setdefault("frame", manager.get("s", "d0")))
+    assert blocker.started.wait(10)
+    assert states(manager, "s")["d0"] == "loading"
+    getattr(manager, action)(*(("s", "d0") if action == "remove" else ("s",)))
+    # the file being read is left to the reader, which deletes it when done
+    assert len(spill_files(manager)) == 1
+    blocker.release.set()
+    reader.join(10)
+
+    pd.testing.assert_frame_equal(result["frame"], frame(0))
+    assert spill_files(manager) == [] and "d0" not in states(manager, "s")
+
+def test_concurrent_readers_share_one_load(manager, monkeypatch):
+    for i in range(3):
+        manager.put("s", f"d{i}", frame(i))
+    blocker = Blocker(pd.read_pickle)
+    monkeypatch.setattr(pd, "read_pickle", blocker)
+
+    results = []
+    readers = [start(lambda: results.append(manager.get("s", "d0"))) for _ in range(3)]
+    assert blocker.started.wait(10)
+    blocker.release.set()
+    for reader in readers:
+        reader.join(10)
+    assert len(results) == 3 and all(result is results[0] for result in results)
+
+def test_session_version_changes_only_for_a_different_frame(manager):
+    frames = SessionFrames(manager=manager)
+    df = frame(0)
+    frames["d"] = df
+    version = frames.version("d")
+    frames["d"] = df
+    assert frames.version("d") == version
+    frames["d"] = df.copy()
+    assert frames.version("d") != version
+    version = frames.version("d")
+
+    # spilling and reloading the dataset does not change its version either
+    frames["other"], frames["third"] = frame(1), frame(2)
+    assert states(manager, frames.owner)["d"] == "spilled"
+    pd.testing.assert_frame_equal(frames["d"], df)
+    assert frames.version("d") == version
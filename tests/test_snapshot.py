@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.snapshot import SNAPSHOT_ERRORS, read_frame, write_frame
+
+def mixed_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "id": pd.array(["a1", None, "c3", "d4"], dtype="string[pyarrow]"),
+        "region": pd.Categorical(["north", "south", None, "north"]),
+        "note": pd.array(["x", "y", None, "z"], dtype="string[python]"),
+        "text": ["p", None, "q", "r"],
+        "x": [1.0, np.nan, 3.0, 4.0],
+        "n": pd.array([1, None, 3, 4], dtype="Int64"),
+        "code": pd.array(["u", "v", "w", None], dtype="string[pyarrow]"),
+    }, index=[10, 11, 13, 17])
+
+def test_arrow_round_trip_keeps_dtypes(tmp_path):
+    df = mixed_frame()
+    file_name = write_frame(df, tmp_path / "part")
+    assert file_name.endswith(".arrow")
+    restored = read_frame(tmp_path / file_name)
+    pd.testing.assert_frame_equal(restored, df)
+    assert restored["id"].dtype.storage == "pyarrow" and restored["code"].dtype.storage == "pyarrow"
+    assert restored["note"].dtype.storage == "python"
+
+def test_mixed_object_columns_fall_back_to_pickle(tmp_path):
+    df = mixed_frame().assign(mixed=[1, "two", 3.0, None])
+    file_name = write_frame(df, tmp_path / "part")
+    assert file_name.endswith(".pkl.gz")
+    pd.testing.assert_frame_equal(read_frame(tmp_path / file_name), df)
+
+def test_corrupt_part_raises_a_snapshot_error(tmp_path):
+    file_name = write_frame(mixed_frame(), tmp_path / "part")
+    path = tmp_path / file_name
+    path.write_bytes(path.read_bytes()[:100])
+    with pytest.raises(SNAPSHOT_ERRORS):
+        read_frame(path)
+    with pytest.raises(SNAPSHOT_ERRORS):
+        read_frame(tmp_path / "missing.arrow")
@@ -0,0 +1,503 @@
+import json
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+#---------------------- Cleaning Steps ---------------------------------
+
+# text (case-insensitive) and numbers recognised when casting to bool; anything else becomes missing
+BOOL_VALUES = {"true": True, "t": True, "yes": True, "y": True, "1": True,
+               "false": False, "f": False, "no": False, "n": False, "0": False}
+
+def _add_categories(series: pd.Series, values: List[Any]) -> pd.Series:
+    # categorical columns only accept known categories, so register new values first
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    new = [value for value in pd.unique(pd.Series(values, dtype=object).dropna())
+           if value not in series.cat.categories]
+    return series.cat.add_categories(new) if new else series
+
+@dataclass
+class DropDuplicates:
+    """Drop duplicated rows, optionally comparing only a subset of columns."""
+    subset: Optional[List[str]] = None
+    kind: str = field(default="drop_duplicates", init=False)
+
+    def columns(self) -> Optional[Set[str]]:
+        return set(self.subset) if self.subset else None
+
+    def describe(self) -> str:
+        return f"Drop duplicates on {', '.join(self.subset)}" if self.subset else "Drop duplicate rows"
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df.drop_duplicates(subset=self.subset)
+
+@dataclass
+class CastType:
+    """Convert a column to another dtype; values that cannot be converted become missing."""
+    column: str
+    dtype: str
+    kind: str = field(default="cast", init=False)
+
+    def columns(self) -> Optional[Set[str]]:
+        return {self.column}
+
+    def describe(self) -> str:
+        return f"Cast {self.column} to {self.dtype}"
+
+    def transform(self, series: pd.Series) -> pd.Series:
+        if self.dtype in ("int64", "float64"):
+            values = pd.to_numeric(series, errors="coerce")
+            if self.dtype == "float64":
+                return values.astype("float64")
+            # integers with missing values need the nullable integer dtype
+            return values.astype("Int64") if values.isna().any() else values.astype("int64")
+        if self.dtype == "datetime64[ns]":
+            return pd.to_datetime(series, errors="coerce")
+        if self.dtype == "bool":
+            # astype("bool") would read every non-empty string, "False" included, as True
+            if pd.api.types.is_bool_dtype(series.dtype):
+                return series.astype("boolean")
+            if pd.api.types.is_numeric_dtype(series.dtype):
+                return series.map({1: True, 0: False}).astype("boolean")
+            return series.astype("string").str.strip().str.lower().map(BOOL_VALUES).astype("boolean")
+        return series.astype(self.dtype)
+
+@dataclass
+class FillMissing:
+    """Fill missing values of a column with a constant or a statistic of the column."""
+    column: str
+    strategy: str = "value"  # one of "value", "mean", "median", "mode"
+    value: Any = None
+    kind: str = field(default="fill_missing", init=False)
+
+    def columns(self) -> Optional[Set[str]]:
+        return {self.column}
+
+    def describe(self) -> str:
+        fill = repr(self.value) if self.strategy == "value" else f"the {self.strategy}"
+        return f"Fill missing {self.column} with {fill}"
+
+    def transform(self, series: pd.Series) -> pd.Series:
+        if self.strategy == "mean":
+            return series.fillna(series.mean())
+        if self.strategy == "median":
+            return series.fillna(series.median())
+        if self.strategy == "mode":
+            mode = series.mode()
+            return series.fillna(mode.iloc[0]) if not mode.empty else series
+        # compactly encoded text columns only accept known categories
+        return _add_categories(series, [self.value]).fillna(self.value)
+
+@dataclass
+class DropMissing:
+    """Drop rows with a missing value in any of the given columns (all columns if none given)."""
+    subset: Optional[List[str]] = None
+    kind: str = field(default="drop_missing", init=False)
+
+    def columns(self) -> Optional[Set[str]]:
+        return set(self.subset) if self.subset else None
+
+    def describe(self) -> str:
+        return f"Drop rows missing {', '.join(self.subset)}" if self.subset else "Drop rows with missing values"
+
+    def mask(self, df: pd.DataFrame) -> pd.Series:
+        return df[self.subset].notna().all(axis=1) if self.subset else df.notna().all(axis=1)
+
+@dataclass
+class Filter:
+    """Keep the rows where `column <op> value` holds."""
+    column: str
+    op: str
+    value: Any = None
+    kind: str = field(default="filter", init=False)
+
+    OPS = ("==", "!=", ">", ">=", "<", "<=", "is missing", "is not missing")
+
+    def columns(self) -> Optional[Set[str]]:
+        return {self.column}
+
+    def describe(self) -> str:
+        if self.op in ("is missing", "is not missing"):
+            return f"Keep rows where {self.column} {self.op}"
+        return f"Keep rows where {self.column} {self.op} {self.value!r}"
+
+    def _compare(self, series: pd.Series) -> pd.Series:
+        comparisons = {
+            "==": series.__eq__, "!=": series.__ne__,
+            ">": series.__gt__, ">=": series.__ge__,
+            "<": series.__lt__, "<=": series.__le__,
+        }
+        return comparisons[self.op](self.value).fillna(False).astype(bool)
+
+    def mask(self, df: pd.DataFrame) -> pd.Series:
+        series = df[self.column]
+        if self.op == "is missing":
+            return series.isna()
+        if self.op == "is not missing":
+            return series.notna()
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # compare each category once, by value (unordered categoricals only support
+            # equality), then look every row up by its code; missing values only match "!="
+            matches = self._compare(pd.Series(series.cat.categories)).to_numpy()
+            codes = series.cat.codes.to_numpy()
+            return pd.Series(np.where(codes >= 0, matches[np.maximum(codes, 0)], self.op == "!="),
+                             index=series.index)
+        return self._compare(series)
+
+def _native(value: Any) -> Any:
+    # plain Python values keep plans JSON-serializable for fingerprints and snapshots
+    if not isinstance(value, (list, dict, np.ndarray)) and pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+def _replace_values(series: pd.Series, values: Dict[Any, Any]) -> pd.Series:
+    # keep the column's dtype when the new values fit it, otherwise let pandas widen it;
+    # numpy int and bool columns cannot hold missing values (bools would read them as False)
+    series = _add_categories(series, list(values.values()))
+    holds_missing = not (pd.api.types.is_integer_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype)) \
+        or pd.api.types.is_extension_array_dtype(series.dtype)
+    updates = None
+    if holds_missing or all(value is not None for value in values.values()):
+        try:
+            updates = pd.Series(list(values.values()), index=list(values), dtype=series.dtype)
+        except (ValueError, TypeError):
+            pass
+    if updates is None:
+        missing = np.nan if pd.api.types.is_integer_dtype(series.dtype) else None
+        updates = pd.Series([missing if value is None else value for value in values.values()], index=list(values))
+    kept = series[~series.index.isin(updates.index)]
+    return pd.concat([kept, updates]).reindex(series.index)
+
+@dataclass
+class EditRows:
+    """
+    Changes made in the data editor, addressed by index label: edited cells, deleted rows
+    and added rows. The editor shows the raw dataset, so this step always runs first.
+    """
+    cells: List[List[Any]] = field(default_factory=list)  # [label, column, value]
+    deleted: List[Any] = field(default_factory=list)
+    added: List[List[Any]] = field(default_factory=list)  # [label, {column: value}]
+    kind: str = field(default="edit_rows", init=False)
+
+    def __bool__(self) -> bool:
+        return bool(self.cells or self.deleted or self.added)
+
+    def columns(self) -> Optional[Set[str]]:
+        return {column for _, column, _ in self.cells}
+
+    def describe(self) -> str:
+        return (f"Apply editor changes ({len(self.cells)} edited cells, "
+                f"{len(self.deleted)} deleted rows, {len(self.added)} added rows)")
+
+    @classmethod
+    def from_editor(cls, displayed: pd.DataFrame, edited: pd.DataFrame, state: Dict[str, Any]) -> "EditRows":
+        """
+        Translate the state of `st.data_editor` into label-addressed changes.
+
+        Args:
+            displayed (pd.DataFrame): The dataframe passed to the editor.
+            edited (pd.DataFrame): The dataframe the editor returned.
+            state (Dict[str, Any]): The editor's widget state, with row positions of `displayed`
+                under "edited_rows" and "deleted_rows" and new rows under "added_rows".
+        Returns:
+            EditRows: The changes.
+        """
+        deleted = [displayed.index[int(pos)] for pos in state.get("deleted_rows", [])]
+        cells = [[_native(displayed.index[int(pos)]), column, _native(edited.at[displayed.index[int(pos)], column])]
+                 for pos, changes in state.get("edited_rows", {}).items()
+                 if displayed.index[int(pos)] not in deleted
+                 for column in changes]
+
+        # the editor can only add rows to datasets with an integer index
+        n_added = len(state.get("added_rows", [])) if pd.api.types.is_integer_dtype(displayed.index) else 0
+        added_rows = edited.iloc[len(edited) - n_added:] if n_added else edited.iloc[:0]
+        # labels continue after every label of the dataset, including deleted ones
+        next_label = int(displayed.index.max()) + 1 if len(displayed) else 0
+        added = [[next_label + i, {column: _native(value) for column, value in row.items()}]
+                 for i, (_, row) in enumerate(added_rows.iterrows())]
+        return cls(cells=cells, deleted=[_native(label) for label in deleted], added=added)
+
+    def combined(self, later: "EditRows") -> "EditRows":
+        """
+        Fold changes made on top of this step's output into a single step.
+
+        Args:
+            later (EditRows): Changes made to the dataframe this step produces.
+        Returns:
+            EditRows: One step equivalent to applying this step and then `later`.
+        """
+        added = {label: dict(row) for label, row in self.added}
+        cells = {(label, column): value for label, column, value in self.cells}
+        deleted = list(self.deleted)
+
+        for label, column, value in later.cells:
+            if label in added:
+                added[label][column] = value
+            else:
+                cells[(label, column)] = value
+        for label in later.deleted:
+            if label in added:
+                del added[label]
+            else:
+                deleted.append(label)
+                cells = {cell: value for cell, value in cells.items() if cell[0] != label}
+        for label, row in later.added:
+            added[label] = dict(row)
+
+        return EditRows(cells=[[label, column, value] for (label, column), value in cells.items()],
+                        deleted=deleted,
+                        added=[[label, row] for label, row in added.items()])
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        out = (df[~df.index.isin(self.deleted)] if self.deleted else df).copy(deep=False)
+
+        by_column: Dict[str, Dict[Any, Any]] = {}
+        for label, column, value in self.cells:
+            if column in out.columns:
+                by_column.setdefault(column, {})[label] = value
+        for column, values in by_column.items():
+            values = {label: value for label, value in values.items() if label in out.index}
+            if values:
+                out[column] = _replace_values(out[column], values)
+
+        if self.added:
+            rows = pd.DataFrame([row for _, row in self.added], index=[label for label, _ in self.added])
+            rows = rows.reindex(columns=out.columns)
+            for column in out.columns:
+                if isinstance(out[column].dtype, pd.CategoricalDtype):
+                    # keep compactly encoded columns categorical instead of falling back to object
+                    out[column] = _add_categories(out[column], rows[column].tolist())
+                    rows[column] = rows[column].astype(out[column].dtype)
+            out = pd.concat([out, rows])
+        return out
+
+Step = Union[DropDuplicates, CastType, FillMissing, DropMissing, Filter, EditRows]
+STEP_TYPES = {cls.__dataclass_fields__["kind"].default: cls
+              for cls in (DropDuplicates, CastType, FillMissing, DropMissing, Filter, EditRows)}
+ROW_FILTERS = (DropMissing, Filter)
+
+# errors a step raises when it does not fit the data, e.g. a comparison with the wrong type
+CLEANING_ERRORS = (ValueError, TypeError, KeyError)
+
+#---------------------- End of Cleaning Steps --------------------------
+
+def _commutes(row_filter: Step, step: Step) -> bool:
+    """Whether a row filter can be moved in front of `step` without changing the result."""
+    if isinstance(step, ROW_FILTERS):
+        return True
+    if isinstance(step, EditRows):
+        # edits address rows of the raw dataset and may change any value
+        return False
+
+    filter_cols = row_filter.columns()
+    if isinstance(step, DropDuplicates):
+        # duplicates agree on every compared column, so they are kept or dropped together
+        return step.subset is None or (filter_cols is not None and filter_cols <= set(step.subset))
+    if isinstance(step, FillMissing) and step.strategy != "value":
+        # the fill statistic is computed over the rows that reach it
+        return False
+    # a cast or constant fill only changes its own column
+    return filter_cols is not None and step.column not in filter_cols
+
+class CleaningPlan:
+    """An ordered, lazily applied list of cleaning steps for one dataset."""
+
+    def __init__(self, steps: Optional[List[Step]] = None) -> None:
+        """
+        Args:
+            steps (Optional[List[Step]]): Initial steps, in the order they were recorded.
+        """
+        self.steps: List[Step] = list(steps or [])
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def add(self, step: Step) -> None:
+        self.steps.append(step)
+
+    def remove(self, index: int) -> None:
+        del self.steps[index]
+
+    @property
+    def edits(self) -> Optional[EditRows]:
+        """The data editor changes recorded in the plan, if any."""
+        return self.steps[0] if self.steps and isinstance(self.steps[0], EditRows) else None
+
+    def set_edits(self, edits: Optional[EditRows]) -> None:
+        """Replace the data editor changes; they are kept as the first step."""
+        if self.edits is not None:
+            del self.steps[0]
+        if edits:
+            self.steps.insert(0, edits)
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        return [asdict(step) for step in self.steps]
+
+    @classmethod
+    def from_dict(cls, steps: List[Dict[str, Any]]) -> "CleaningPlan":
+        plan = cls()
+        for params in steps:
+            params = dict(params)
+            plan.add(STEP_TYPES[params.pop("kind")](**params))
+        return plan
+
+    def fingerprint(self) -> str:
+        """Returns a string identifying the plan's content, used to cache its results."""
+        return json.dumps(self.to_dict(), sort_keys=True, default=str)
+
+    def optimized(self) -> List[Step]:
+        """
+        Reorder the steps for execution: every row filter is moved as early as it can go
+        without changing the result, so that deduplication, casts and fills run on fewer rows.
+
+        Returns:
+            List[Step]: The steps in execution order.
+        """
+        steps: List[Step] = []
+        for step in self.steps:
+            position = len(steps)
+            if isinstance(step, ROW_FILTERS):
+                while position > 0 and _commutes(step, steps[position - 1]):
+                    position -= 1
+            steps.insert(position, step)
+        return steps
+
+    def required_columns(self, df: pd.DataFrame, columns: Optional[List[str]]) -> List[str]:
+        """
+        Columns that must be read to produce `columns` of the cleaned output.
+
+        Args:
+            df (pd.DataFrame): The raw dataset.
+            columns (Optional[List[str]]): Output columns needed downstream; None for all.
+        Returns:
+            List[str]: The columns to read, in the dataset's order.
+        """
+        if columns is None:
+            return list(df.columns)
+
+        needed = set(columns)
+        for step in self.steps:
+            step_cols = step.columns()
+            if step_cols is None:
+                # full-row deduplication or missing-value checks depend on every column
+                return list(df.columns)
+            needed |= step_cols
+        return [col for col in df.columns if col in needed]
+
+    def execute(self, df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Apply the optimized plan in one pass.
+
+        Consecutive row filters are fused into a single boolean mask, and only the
+        columns required by the steps and by `columns` are carried through.
+
+        Args:
+            df (pd.DataFrame): The raw dataset. It is never modified.
+            columns (Optional[List[str]]): Output columns needed downstream; None for all.
+        Returns:
+            pd.DataFrame: The cleaned dataset.
+        """
+        out = df[self.required_columns(df, columns)] if columns is not None else df
+        copied = False
+        mask: Optional[np.ndarray] = None
+
+        for step in self.optimized():
+            if isinstance(step, ROW_FILTERS):
+                step_mask = step.mask(out).to_numpy()
+                mask = step_mask if mask is None else mask & step_mask
+                continue
+
+            if mask is not None:
+                out, mask, copied = out[mask].copy(deep=False), None, True
+
+            if isinstance(step, (DropDuplicates, EditRows)):
+                # a deduplicated frame is a slice of its input; copy it before assigning columns
+                out, copied = step.apply(out), isinstance(step, EditRows)
+            else:
+                if not copied:
+                    out, copied = out.copy(deep=False), True
+                out[step.column] = step.transform(out[step.column])
+
+        if mask is not None:
+            out = out[mask]
+        return out[columns] if columns is not None else out
+
+    def preview(self, df: pd.DataFrame, n_rows: int = 1000) -> pd.DataFrame:
+        """
+        Apply the plan to a random sample for an instant preview.
+
+        Statistics used by fills are computed on the sample, so they can differ
+        slightly from the full run.
+
+        Args:
+            df (pd.DataFrame): The raw dataset.
+            n_rows (int): Size of the sample.
+        Returns:
+            pd.DataFrame: The cleaned sample.
+        """
+        return self.execute(df.sample(min(len(df), n_rows), random_state=42).sort_index())
+
+#---------------------- Session Helpers --------------------------
+
+def get_plan(key: str) -> CleaningPlan:
+    """
+    Return the cleaning plan recorded for a session dataset, creating an empty one.
+
+    Args:
+        key (str): Name of the dataset in `st.session_state["dataframes"]`.
+    Returns:
+        CleaningPlan: The plan.
+    """
+    plans: Dict[str, CleaningPlan] = st.session_state.setdefault("cleaning_plans", {})
+    return plans.setdefault(key, CleaningPlan())
+
+def dataset_version(key: str) -> Tuple[int, str]:
+    """
+    Identify the current state of a cleaned dataset: its raw version and its plan.
+
+    Args:
+        key (str): Name of the dataset in `st.session_state["dataframes"]`.
+    Returns:
+        Tuple[int, str]: Raw dataset version and plan fingerprint.
+    """
+    return st.session_state["dataframes"].version(key), get_plan(key).fingerprint()
+
+def cleaned_frame(key: str) -> pd.DataFrame:
+    """
+    Return a session dataset with its cleaning plan applied, running the plan on the
+    full dataset only the first time it is needed after the data or the plan changed.
+    The whole dataset is cleaned rather than only the columns a page reads, since pages
+    pick their columns from the cleaned data and share the cached result.
+    If a step cannot be applied, the error is shown and the page stops.
+
+    Args:
+        key (str): Name of the dataset in `st.session_state["dataframes"]`.
+    Returns:
+        pd.DataFrame: The cleaned dataset.
+    """
+    frames = st.session_state["dataframes"]
+    plan = get_plan(key)
+    if not len(plan):
+        return frames[key]
+
+    version = dataset_version(key)
+    versions: Dict[str, Tuple[int, str]] = st.session_state.setdefault("cleaned_versions", {})
+    cleaned = frames.get_derived(key) if versions.get(key) == version else None
+    if cleaned is None:
+        try:
+            with st.spinner(f"Applying {len(plan)} cleaning step(s) to {key}..."):
+                cleaned = plan.execute(frames[key])
+        except CLEANING_ERRORS as e:
+            st.error(f"The cleaning plan of {key} cannot be applied: {e}. "
+                     "Fix or remove the failing step on the Load & Clean page.")
+            st.stop()
+        frames.put_derived(key, cleaned)
+        versions[key] = version
+    return cleaned
+
+#---------------------- End of Session Helpers --------------------------
@@ -1,8 +1,11 @@
 import numpy as np
 import pandas as pd
+from itertools import combinations_with_replacement
+from math import comb
 from scipy import stats
 from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.preprocessing import PolynomialFeatures
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
 
 def freedman_draconis_rule(series: pd.Series) -> int:
     return int((series.max() - series.min()) // \
@@ -45,6 +48,131 @@ def fisher_exact_test(x: pd.Series, y: pd.Series):
 
 #---------------------- End of Statistical Tests --------------------------
 
+#---------------------- Grouped Statistics ---------------------------------
+
+@dataclass
+class GroupIndex:
+    """A factorized group column: per-row group codes (-1 for missing) and group labels."""
+    codes: np.ndarray
+    labels: pd.Index
+    sizes: np.ndarray
+
+def factorize_groups(series: pd.Series) -> GroupIndex:
+    codes, labels = pd.factorize(series, sort=True)
+    sizes = np.bincount(codes[codes >= 0], minlength=len(labels))
+    return GroupIndex(codes=codes, labels=pd.Index(labels, name=series.name), sizes=sizes)
+
+def largest_groups(groups: GroupIndex, n_groups: int) -> GroupIndex:
+    """
+    Restrict a factorized column to its `n_groups` largest groups; rows of the other
+    groups are treated like missing values.
+
+    Args:
+        groups (GroupIndex): The factorized column.
+        n_groups (int): Number of groups to keep.
+    Returns:
+        GroupIndex: The largest groups, in their original (sorted) order.
+    """
+    if len(groups.labels) <= n_groups:
+        return groups
+    keep = np.sort(np.argsort(-groups.sizes, kind="stable")[:n_groups])
+    remap = np.full(len(groups.labels), -1, dtype=np.int64)
+    remap[keep] = np.arange(len(keep))
+    codes = np.where(groups.codes >= 0, remap[np.maximum(groups.codes, 0)], -1)
+    return GroupIndex(codes=codes, labels=groups.labels[keep], sizes=groups.sizes[keep])
+
+def _grouped_column(groups: GroupIndex, values: np.ndarray, quantiles: Sequence[float]) -> Dict[str, np.ndarray]:
+    n_groups = len(groups.labels)
+    valid = (groups.codes >= 0) & ~np.isnan(values)
+    codes, values = groups.codes[valid], values[valid]
+
+    count = np.bincount(codes, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(codes, weights=values, minlength=n_groups) / count
+        # two-pass variance around the group means for numerical stability
+        var = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=n_groups) / (count - 1)
+    var[count < 2] = np.nan
+    stats_ = {"count": count, "mean": mean, "var": var}
+
+    # sort by (group, value) once, then read every quantile of every group by position
+    ordered = values[np.lexsort((values, codes))]
+    starts = np.cumsum(count) - count
+    for q in quantiles:
+        position = q * np.maximum(count - 1, 0)
+        lower, upper = np.floor(position).astype(np.int64), np.ceil(position).astype(np.int64)
+        lo = ordered[np.minimum(starts + lower, len(ordered) - 1)] if len(ordered) else np.zeros(n_groups)
+        hi = ordered[np.minimum(starts + upper, len(ordered) - 1)] if len(ordered) else np.zeros(n_groups)
+        quantile = lo + (hi - lo) * (position - lower)
+        quantile[count == 0] = np.nan
+        stats_[f"{q:.0%}"] = quantile
+    return stats_
+
+def grouped_summary(df: pd.DataFrame, groups: GroupIndex, columns: Sequence[str],
+                    quantiles: Sequence[float] = (0.25, 0.5, 0.75)) -> pd.DataFrame:
+    frames = {col: pd.DataFrame(_grouped_column(groups, df[col].to_numpy(dtype=float, na_value=np.nan), quantiles),
+                                index=groups.labels)
+              for col in columns}
+    return pd.concat(frames, axis=1)
+
+#---------------------- End of Grouped Statistics --------------------------
+
+#---------------------- Bootstrap Confidence Intervals ---------------------------------
+
+def _bootstrap_batches(n: int, n_resamples: int, rng: np.random.Generator, max_elements: int = 10_000_000):
+    # yields (batch, n) matrices of resampled row indices, bounded to `max_elements` entries each
+    batch_size = max(1, min(n_resamples, max_elements // max(n, 1)))
+    for start in range(0, n_resamples, batch_size):
+        yield rng.integers(0, n, size=(min(batch_size, n_resamples - start), n))
+
+def _confusion_matrices(pairs: np.ndarray, idx: np.ndarray, n_labels: int) -> np.ndarray:
+    # one bincount over every resample: offset each resample's (true, pred) codes into its own block
+    offsets = (np.arange(idx.shape[0]) * n_labels**2)[:, None]
+    counts = np.bincount((pairs[idx] + offsets).ravel(), minlength=idx.shape[0] * n_labels**2)
+    return counts.reshape(idx.shape[0], n_labels, n_labels)
+
+def _f1_from_confusion(confusion: np.ndarray, pos: Optional[int]) -> np.ndarray:
+    tp = np.diagonal(confusion, axis1=1, axis2=2).astype(float)
+    fp = confusion.sum(axis=1) - tp
+    fn = confusion.sum(axis=2) - tp
+    denominator = 2 * tp + fp + fn
+    with np.errstate(invalid="ignore", divide="ignore"):
+        f1 = np.where(denominator > 0, 2 * tp / denominator, np.nan)
+    if pos is not None:
+        return np.nan_to_num(f1[:, pos])
+    # like sklearn, macro-average over the labels present in each resample
+    return np.nanmean(f1, axis=1)
+
+def bootstrap_metric_ci(y_true: np.ndarray, y_pred: np.ndarray, pred_type: str, n_resamples: int = 1000,
+                        confidence: float = 0.95, random_state: int = 42) -> Dict[str, Tuple[float, float]]:
+    y_true, y_pred = np.asarray(y_true), np.asarray(y_pred)
+    n = len(y_true)
+    rng = np.random.default_rng(random_state)
+    samples: Dict[str, List[np.ndarray]] = {}
+
+    if pred_type == "lr":
+        abs_error = np.abs(y_true - y_pred)
+        sq_log_error = (np.log1p(y_true) - np.log1p(y_pred)) ** 2
+        for idx in _bootstrap_batches(n, n_resamples, rng):
+            samples.setdefault("Mean Absolute Error", []).append(abs_error[idx].mean(axis=1))
+            samples.setdefault("Root Mean Squared Log Error", []).append(np.sqrt(sq_log_error[idx].mean(axis=1)))
+    else:
+        labels, codes = np.unique(np.concatenate([y_true, y_pred]), return_inverse=True)
+        pairs = codes[:n] * len(labels) + codes[n:]
+        # binary F1 scores the positive label 1, as sklearn's f1_score does by default
+        pos = None
+        if len(np.unique(y_true)) == 2:
+            pos = int(np.flatnonzero(labels == 1)[0]) if (labels == 1).any() else len(labels) - 1
+        for idx in _bootstrap_batches(n, n_resamples, rng):
+            confusion = _confusion_matrices(pairs, idx, len(labels))
+            samples.setdefault("Accuracy", []).append(np.trace(confusion, axis1=1, axis2=2) / n)
+            samples.setdefault("F1 Score", []).append(_f1_from_confusion(confusion, pos))
+
+    alpha = (1 - confidence) / 2
+    return {name: tuple(float(bound) for bound in np.nanquantile(np.concatenate(values), [alpha, 1 - alpha]))
+            for name, values in samples.items()}
+
+#---------------------- End of Bootstrap Confidence Intervals --------------------------
+
 #---------------------- Modelling Techniques --------------------------
 
 def linear_regression(df, x, y):
@@ -53,12 +181,164 @@ def linear_regression(df, x, y):
 
     return model
 
-def polynomial_regression(df, x, y):
-    poly = PolynomialFeatures(degree=2, include_bias=True)
-    poly_features = poly.fit_transform(x.reshape(-1,1))
+# polynomial design matrices are built a chunk of rows at a time within this many bytes, and
+# expansions with more terms are refused: each fold keeps a Gram matrix of n_terms^2 floats
+POLYNOMIAL_CHUNK_BYTES = 64 * 2**20
+MAX_POLYNOMIAL_TERMS = 1_000
 
-    model = LinearRegression()
-    model.fit(poly_features, y)
+def n_polynomial_terms(n_features: int, degree: int) -> int:
+    """Returns the number of terms (including the intercept) of a full polynomial expansion."""
+    return comb(n_features + degree, degree)
+
+def max_polynomial_degree(n_features: int, limit: int = 8) -> int:
+    """
+    Highest degree, up to `limit`, whose expansion of `n_features` stays within MAX_POLYNOMIAL_TERMS.
+
+    Args:
+        n_features (int): Number of independent variables.
+        limit (int): Highest degree to consider.
+    Returns:
+        int: The degree, or 0 if even a linear fit has too many terms.
+    """
+    degree = 0
+    while degree < limit and n_polynomial_terms(n_features, degree + 1) <= MAX_POLYNOMIAL_TERMS:
+        degree += 1
+    return degree
+
+def polynomial_terms(n_features: int, degree: int) -> List[Tuple[int, ...]]:
+    # ordered by total degree, so the terms of any lower degree form a prefix
+    return [term for d in range(degree + 1)
+            for term in combinations_with_replacement(range(n_features), d)]
+
+def expand_polynomial(x: np.ndarray, terms: List[Tuple[int, ...]]) -> np.ndarray:
+    # every term is its parent term (all but the last factor) times one feature
+    features = np.empty((x.shape[0], len(terms)))
+    position = {}
+    for j, term in enumerate(terms):
+        features[:, j] = 1.0 if not term else features[:, position[term[:-1]]] * x[:, term[-1]]
+        position[term] = j
+    return features
+
+class PolynomialGram:
+    """
+    Normal-equation statistics (X'X, X'y, y'y) of a polynomial expansion up to `max_degree`,
+    accumulated chunk by chunk and kept separately for each cross-validation fold.
+    The statistics of any lower degree are the leading sub-blocks of these.
+    """
+
+    def __init__(self, n_features: int, max_degree: int, n_folds: int = 1):
+        self.n_features = n_features
+        self.max_degree = max_degree
+        self.terms = polynomial_terms(n_features, max_degree)
+        n_terms = len(self.terms)
+        self.gram = np.zeros((n_folds, n_terms, n_terms))
+        self.xty = np.zeros((n_folds, n_terms))
+        self.yty = np.zeros(n_folds)
+        self.counts = np.zeros(n_folds, dtype=np.int64)
+
+    def n_terms(self, degree: int) -> int:
+        return n_polynomial_terms(self.n_features, degree)
+
+    def update(self, x: np.ndarray, y: np.ndarray, folds: np.ndarray) -> None:
+        # expand the rows in fold order so every fold is a contiguous view of one block
+        order = np.argsort(folds, kind="stable")
+        features = expand_polynomial(x[order], self.terms)
+        target = y[order]
+        bounds = np.searchsorted(folds[order], np.arange(len(self.counts) + 1))
+        for fold in range(len(self.counts)):
+            block, fold_target = features[bounds[fold]:bounds[fold + 1]], target[bounds[fold]:bounds[fold + 1]]
+            self.gram[fold] += block.T @ block
+            self.xty[fold] += block.T @ fold_target
+            self.yty[fold] += fold_target @ fold_target
+            self.counts[fold] += len(block)
+
+    def solve(self, degree: int, exclude_fold: Optional[int] = None, ridge: float = 1e-10) -> np.ndarray:
+        m = self.n_terms(degree)
+        keep = np.arange(len(self.counts)) != exclude_fold
+        gram = self.gram[keep].sum(axis=0)[:m, :m]
+        xty = self.xty[keep].sum(axis=0)[:m]
+        # a tiny ridge keeps the system solvable when terms are collinear
+        gram = gram + ridge * np.trace(gram) / m * np.eye(m)
+        try:
+            return np.linalg.solve(gram, xty)
+        except np.linalg.LinAlgError:
+            return np.linalg.lstsq(gram, xty, rcond=None)[0]
+
+    def fold_sse(self, degree: int, fold: int, beta: np.ndarray) -> float:
+        # ||y - Xb||^2 = y'y - 2b'X'y + b'X'Xb, using the fold's own statistics
+        m = self.n_terms(degree)
+        return float(self.yty[fold] - 2 * beta @ self.xty[fold, :m] + beta @ self.gram[fold, :m, :m] @ beta)
+
+class PolynomialRegression:
+    """
+    Least-squares polynomial regression on any number of features. The degree is picked
+    by k-fold cross-validation computed entirely from the per-fold Gram matrices, and the
+    design matrix is only ever built as many rows at a time as fit in `chunk_bytes`.
+    """
+
+    def __init__(self, max_degree: int = 5, degree: Optional[int] = None,
+                 n_folds: int = 5, chunk_bytes: int = POLYNOMIAL_CHUNK_BYTES, random_state: int = 42):
+        self.max_degree = degree if degree is not None else max_degree
+        self.degree = degree
+        self.n_folds = n_folds
+        self.chunk_bytes = chunk_bytes
+        self.random_state = random_state
+
+    def _chunk_rows(self, n_terms: int) -> int:
+        return max(1, self.chunk_bytes // (8 * n_terms))
+
+    def _scale(self, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=float)
+        x = x.reshape(-1, 1) if x.ndim == 1 else x
+        return (x - self.mean_) / self.scale_
+
+    def fit(self, x: np.ndarray, y: np.ndarray) -> "PolynomialRegression":
+        x = np.asarray(x, dtype=float)
+        x = x.reshape(-1, 1) if x.ndim == 1 else x
+        y = np.asarray(y, dtype=float)
+        # one missing value would turn every Gram entry, CV score and coefficient into NaN
+        for name, values in (("X", x), ("y", y)):
+            if not np.isfinite(values).all():
+                raise ValueError(f"Input {name} contains NaN or infinity; drop or fill the missing values first.")
+        n_terms = n_polynomial_terms(x.shape[1], self.max_degree)
+        if n_terms > MAX_POLYNOMIAL_TERMS:
+            raise ValueError(f"A degree {self.max_degree} polynomial of {x.shape[1]} features has {n_terms:,} terms; "
+                             f"at most {MAX_POLYNOMIAL_TERMS:,} are supported. Use fewer features or a lower degree.")
+        # standardising the features keeps the Gram matrix well conditioned at higher degrees
+        self.mean_ = x.mean(axis=0)
+        self.scale_ = np.where(x.std(axis=0) > 0, x.std(axis=0), 1.0)
+
+        n_folds = self.n_folds if self.degree is None else 1
+        folds = np.random.default_rng(self.random_state).integers(0, n_folds, size=x.shape[0])
+        self.gram_ = PolynomialGram(x.shape[1], self.max_degree, n_folds)
+        chunk_rows = self._chunk_rows(n_terms)
+        for start in range(0, x.shape[0], chunk_rows):
+            stop = start + chunk_rows
+            self.gram_.update(self._scale(x[start:stop]), y[start:stop], folds[start:stop])
+
+        self.cv_scores_: Dict[int, float] = {}
+        if self.degree is None:
+            for degree in range(1, self.max_degree + 1):
+                sse = sum(self.gram_.fold_sse(degree, fold, self.gram_.solve(degree, exclude_fold=fold))
+                          for fold in range(n_folds))
+                self.cv_scores_[degree] = sse / x.shape[0]
+            self.degree_ = min(self.cv_scores_, key=self.cv_scores_.get)
+        else:
+            self.degree_ = self.degree
+
+        self.terms_ = self.gram_.terms[:self.gram_.n_terms(self.degree_)]
+        self.coef_ = self.gram_.solve(self.degree_)
+        return self
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        x = self._scale(x)
+        chunk_rows = self._chunk_rows(len(self.terms_))
+        return np.concatenate([expand_polynomial(x[start:start + chunk_rows], self.terms_) @ self.coef_
+                               for start in range(0, x.shape[0], chunk_rows)] or [np.empty(0)])
+
+def polynomial_regression(df, x, y, max_degree=5):
+    model = PolynomialRegression(max_degree=max_degree)
+    model.fit(x, y)
 
     return model
 
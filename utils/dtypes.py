@@ -0,0 +1,75 @@
+from typing import List, Tuple
+
+import pandas as pd
+from pandas.api import types
+
+# text columns with at most this share of distinct values are dictionary-encoded as
+# categoricals; the remaining text columns are stored as Arrow-backed strings
+CATEGORY_MAX_RATIO = 0.5
+
+def is_numeric_column(series: pd.Series) -> bool:
+    """
+    Whether a column holds numbers, whatever their width or backing (numpy, nullable, Arrow).
+
+    Args:
+        series (pd.Series): The column.
+    Returns:
+        bool: True for integer and float columns; booleans are not numeric.
+    """
+    return types.is_numeric_dtype(series.dtype) and not types.is_bool_dtype(series.dtype)
+
+def is_categorical_column(series: pd.Series) -> bool:
+    """
+    Whether a column holds categories: text (object or string dtypes) or pandas categoricals.
+
+    Args:
+        series (pd.Series): The column.
+    Returns:
+        bool: True for categorical columns.
+    """
+    return (isinstance(series.dtype, pd.CategoricalDtype)
+            or types.is_object_dtype(series.dtype)
+            or types.is_string_dtype(series.dtype))
+
+def numeric_columns(df: pd.DataFrame) -> List[str]:
+    """Returns the names of the numeric columns of a dataframe."""
+    return [col for col in df.columns if is_numeric_column(df[col])]
+
+def categorical_columns(df: pd.DataFrame) -> List[str]:
+    """Returns the names of the categorical columns of a dataframe."""
+    return [col for col in df.columns if is_categorical_column(df[col])]
+
+def compact_dtypes(df: pd.DataFrame, max_category_ratio: float = CATEGORY_MAX_RATIO) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Re-encode the text columns of a freshly loaded dataframe.
+
+    Object columns holding only strings become categoricals when they have few distinct
+    values relative to their length, and Arrow-backed strings otherwise. Object columns
+    with mixed values are left untouched.
+
+    Args:
+        df (pd.DataFrame): The loaded dataframe.
+        max_category_ratio (float): Highest share of distinct values encoded as a categorical.
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: The re-encoded dataframe and a per-column report
+        of the encoding and memory before and after, in bytes.
+    """
+    rows = []
+    out = df.copy(deep=False)
+    for col in df.columns:
+        series = df[col]
+        if not types.is_object_dtype(series.dtype) or types.infer_dtype(series, skipna=True) != "string":
+            continue
+
+        ratio = series.nunique(dropna=True) / max(len(series), 1)
+        encoding = "category" if ratio <= max_category_ratio else "string[pyarrow]"
+        encoded = series.astype(encoding)
+        out[col] = encoded
+        rows.append({
+            "column": col,
+            "encoding": encoding,
+            "before": int(series.memory_usage(index=False, deep=True)),
+            "after": int(encoded.memory_usage(index=False, deep=True)),
+        })
+
+    return out, pd.DataFrame(rows, columns=["column", "encoding", "before", "after"])
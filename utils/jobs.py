@@ -0,0 +1,267 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import streamlit as st
+
+# Jobs run on threads rather than processes: numpy, scipy and scikit-learn release the GIL
+# in their heavy loops, and the session dataframes can be passed without pickling. The price
+# is that a running scipy or scikit-learn call cannot be interrupted: cancelling a job only
+# stops it at its next progress report and discards its result, and the job keeps its worker
+# (and its place in the session's job limit) until the call returns.
+MAX_WORKERS = int(os.environ.get("STATSGRAPH_MAX_JOBS", min(4, os.cpu_count() or 1)))
+MAX_JOBS_PER_SESSION = int(os.environ.get("STATSGRAPH_MAX_JOBS_PER_SESSION", 2))
+
+_current = threading.local()
+
+class JobCancelled(Exception):
+    """Raised inside a job when its cancellation has been requested."""
+
+class JobLimitError(RuntimeError):
+    """Raised when a session already has the maximum number of active jobs."""
+
+class Job:
+    """A handle on a computation submitted to the JobScheduler."""
+
+    def __init__(self, owner: str, label: str, context: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Args:
+            owner (str): Identifier of the session that submitted the job.
+            label (str): Human readable description shown while the job runs.
+            context (Optional[Dict[str, Any]]): Arbitrary data needed to render the result.
+        """
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.label = label
+        self.context = context or {}
+        self.progress = 0.0
+        self.message = "Queued"
+        self.submitted_at = time.time()
+        self.future: Optional[Future] = None
+        self._cancel_event = threading.Event()
+
+    def update(self, progress: float, message: str = "") -> None:
+        """
+        Report progress from inside the job. Raises JobCancelled if the job was cancelled.
+
+        Args:
+            progress (float): Fraction of the work done, between 0 and 1.
+            message (str): Short description of the current step.
+        """
+        if self._cancel_event.is_set():
+            raise JobCancelled(self.label)
+        self.progress = min(max(progress, 0.0), 1.0)
+        if message:
+            self.message = message
+
+    def cancel(self) -> None:
+        """
+        Request cancellation. Queued jobs never start; running jobs stop at their next
+        progress update, and their result is discarded either way. A computation that is
+        already inside a library call runs to completion first.
+        """
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def status(self) -> str:
+        """One of "queued", "running", "done", "failed", "cancelling" or "cancelled"."""
+        if self.cancelled:
+            # a cancelled job still occupies its worker until the computation returns
+            if self.future is not None and not self.future.done():
+                return "cancelling"
+            return "cancelled"
+        if self.future is None or not (self.future.running() or self.future.done()):
+            return "queued"
+        if not self.future.done():
+            return "running"
+        return "failed" if self.future.exception() is not None else "done"
+
+    def done(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def result(self) -> Any:
+        return self.future.result()
+
+    def exception(self) -> Optional[BaseException]:
+        return self.future.exception()
+
+class JobScheduler:
+    """A server-wide pool that runs jobs for every session with bounded concurrency."""
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_jobs_per_session: int = MAX_JOBS_PER_SESSION) -> None:
+        """
+        Args:
+            max_workers (int): Number of jobs allowed to run at the same time on this server.
+            max_jobs_per_session (int): Number of queued or running jobs a single session may hold.
+        """
+        self.max_workers = max_workers
+        self.max_jobs_per_session = max_jobs_per_session
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="statsgraph-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def active_jobs(self, owner: Optional[str] = None) -> List[Job]:
+        """
+        List jobs that are queued, running or still winding down after a cancellation.
+
+        Args:
+            owner (Optional[str]): Restrict the list to one session.
+        Returns:
+            List[Job]: The active jobs.
+        """
+        with self._lock:
+            self._jobs = {job_id: job for job_id, job in self._jobs.items() if not job.done()}
+            return [job for job in self._jobs.values() if owner is None or job.owner == owner]
+
+    def submit(self, owner: str, label: str, func: Callable[..., Any], *args: Any,
+               context: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Job:
+        """
+        Submit `func(*args, **kwargs)` to the pool.
+
+        Args:
+            owner (str): Identifier of the submitting session.
+            label (str): Human readable description of the job.
+            func (Callable[..., Any]): The computation. It may call `report_progress`.
+            context (Optional[Dict[str, Any]]): Data kept on the job for rendering its result.
+        Returns:
+            Job: The handle of the submitted job.
+        Raises:
+            JobLimitError: If the session already holds `max_jobs_per_session` active jobs.
+        """
+        if len(self.active_jobs(owner)) >= self.max_jobs_per_session:
+            raise JobLimitError(
+                f"At most {self.max_jobs_per_session} jobs can run at once per session. "
+                "Wait for a job to finish; cancelled jobs free their slot once their current computation returns."
+            )
+
+        job = Job(owner=owner, label=label, context=context)
+        with self._lock:
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(_run, job, func, args, kwargs)
+        return job
+
+def _run(job: Job, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    if job.cancelled:
+        raise JobCancelled(job.label)
+    _current.job = job
+    try:
+        job.update(0.0, "Running")
+        result = func(*args, **kwargs)
+        job.update(1.0, "Done")
+        return result
+    finally:
+        _current.job = None
+
+def report_progress(progress: float, message: str = "") -> None:
+    """
+    Report progress of the job running on the current thread. Does nothing outside a job,
+    so computations can call it unconditionally.
+
+    Args:
+        progress (float): Fraction of the work done, between 0 and 1.
+        message (str): Short description of the current step.
+    Raises:
+        JobCancelled: If the current job was cancelled.
+    """
+    job = getattr(_current, "job", None)
+    if job is not None:
+        job.update(progress, message)
+
+@st.cache_resource
+def get_scheduler() -> JobScheduler:
+    """Returns the JobScheduler shared by every session on this server."""
+    return JobScheduler()
+
+def session_id() -> str:
+    """Returns a stable identifier of the current browser session."""
+    return st.session_state.setdefault("session_id", uuid.uuid4().hex)
+
+#---------------------- Streamlit Helpers --------------------------
+
+def submit_job(key: str, label: str, func: Callable[..., Any], *args: Any,
+               context: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Optional[Job]:
+    """
+    Submit a job and keep its handle in session state under `key`, cancelling any
+    previous job stored under the same key.
+
+    Args:
+        key (str): Session state key of the job handle.
+        label (str): Human readable description of the job.
+        func (Callable[..., Any]): The computation.
+        context (Optional[Dict[str, Any]]): Data kept on the job for rendering its result.
+    Returns:
+        Optional[Job]: The job, or None if the session's job limit was reached.
+    """
+    previous: Optional[Job] = st.session_state.get(key)
+    if previous is not None and not previous.done():
+        previous.cancel()
+
+    try:
+        job = get_scheduler().submit(session_id(), label, func, *args, context=context, **kwargs)
+    except JobLimitError as e:
+        st.error(str(e))
+        return None
+
+    st.session_state[key] = job
+    return job
+
+@st.fragment(run_every=0.5)
+def _job_progress(key: str) -> None:
+    job: Optional[Job] = st.session_state.get(key)
+    if job is None or job.done():
+        st.rerun()
+
+    status = job.status
+    if status == "cancelling":
+        st.info(f"⏳ {job.label}: cancelling, waiting for the current computation to return. Its result will be discarded.")
+        return
+    if status == "queued":
+        st.info(f"⏳ {job.label}: waiting for a free worker.")
+    else:
+        st.progress(job.progress, text=f"{job.label}: {job.message}")
+
+    if st.button("Cancel", key=f"cancel_{key}"):
+        job.cancel()
+        st.rerun()
+
+def job_result(key: str) -> Optional[Job]:
+    """
+    Render the state of the job stored under `key`.
+
+    While the job is queued or running a progress bar with a cancel button is shown and
+    refreshed in place; the page reruns once the job finishes. Cancel only discards the
+    result: a computation that is already running is left to finish in the background.
+
+    Args:
+        key (str): Session state key of the job handle.
+    Returns:
+        Optional[Job]: The job if it finished successfully, otherwise None.
+    """
+    job: Optional[Job] = st.session_state.get(key)
+    if job is None:
+        return None
+
+    status = job.status
+    if status == "cancelled":
+        st.warning(f"{job.label} was cancelled.")
+        del st.session_state[key]
+        return None
+    if status == "failed":
+        st.error(f"{job.label} failed: {job.exception()}")
+        return None
+    if status == "done":
+        return job
+
+    _job_progress(key)
+    return None
+
+#---------------------- End of Streamlit Helpers --------------------------
@@ -0,0 +1,213 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.cleaning import cleaned_frame, dataset_version
+
+# build a hash table on the smaller side when it is at most this many rows, or
+# at most this fraction of the larger side; otherwise sort both sides and merge
+HASH_JOIN_MAX_ROWS = 100_000
+HASH_JOIN_MAX_RATIO = 0.1
+
+@dataclass
+class JoinResult:
+    """Row positions pairing two dataframes on their key columns (inner join)."""
+    left_index: np.ndarray
+    right_index: np.ndarray
+    strategy: str
+    left_rows: int
+    right_rows: int
+
+    @property
+    def output_rows(self) -> int:
+        return len(self.left_index)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise how well the two datasets matched.
+
+        Returns:
+            Dict[str, Any]: Strategy, matched and unmatched rows per side and output rows.
+        """
+        matched_left = len(np.unique(self.left_index))
+        matched_right = len(np.unique(self.right_index))
+        return {
+            "strategy": self.strategy,
+            "output_rows": self.output_rows,
+            "matched_left": matched_left,
+            "matched_right": matched_right,
+            "unmatched_left": self.left_rows - matched_left,
+            "unmatched_right": self.right_rows - matched_right,
+        }
+
+    def align(self, left: pd.Series, right: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """
+        Reorder a column of each dataset so that row i of both results is a matched pair.
+
+        Args:
+            left (pd.Series): Column of the left dataset.
+            right (pd.Series): Column of the right dataset.
+        Returns:
+            Tuple[pd.Series, pd.Series]: The aligned columns.
+        """
+        return (left.iloc[self.left_index].reset_index(drop=True),
+                right.iloc[self.right_index].reset_index(drop=True))
+
+def encode_keys(left: pd.DataFrame, right: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Map the key columns of both sides to shared dense integer codes.
+
+    Rows with a missing key get code -1 and never match.
+
+    Args:
+        left (pd.DataFrame): Key columns of the left dataset.
+        right (pd.DataFrame): Key columns of the right dataset, in the same order.
+    Returns:
+        Tuple[np.ndarray, np.ndarray, int]: Left codes, right codes and the number of distinct keys.
+    """
+    n_left = len(left)
+    codes = np.zeros(n_left + len(right), dtype=np.int64)
+    missing = np.zeros(len(codes), dtype=bool)
+    n_codes = 1
+
+    for left_col, right_col in zip(left.columns, right.columns):
+        values = pd.concat([left[left_col], right[right_col]], ignore_index=True)
+        col_codes, uniques = pd.factorize(values)
+        missing |= col_codes < 0
+        # combine with the codes of the previous columns and re-densify to avoid overflow
+        codes, combined = pd.factorize(codes * (len(uniques) + 1) + col_codes + 1)
+        n_codes = len(combined)
+
+    codes[missing] = -1
+    return codes[:n_left], codes[n_left:], n_codes
+
+def _expand_matches(probe_codes: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    valid = probe_codes >= 0
+    matches = np.where(valid, counts[np.where(valid, probe_codes, 0)], 0)
+    probe_index = np.repeat(np.arange(len(probe_codes)), matches)
+    first = np.repeat(np.cumsum(matches) - matches, matches)
+    offsets = np.arange(len(probe_index)) - first
+    slots = starts[probe_codes[probe_index]] + offsets
+    return probe_index, slots
+
+def hash_join(build_codes: np.ndarray, probe_codes: np.ndarray, n_codes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Join by building a direct-address table on the (smaller) build side and
+    probing it with every row of the other side in a single vectorized pass.
+
+    Args:
+        build_codes (np.ndarray): Key codes of the build side.
+        probe_codes (np.ndarray): Key codes of the probe side.
+        n_codes (int): Number of distinct key codes.
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Matched row positions on the build and probe sides.
+    """
+    valid = build_codes >= 0
+    counts = np.bincount(build_codes[valid], minlength=n_codes)
+    starts = np.cumsum(counts) - counts
+    # bucket the build rows by key, preserving their original order within each key
+    buckets = np.flatnonzero(valid)[np.argsort(build_codes[valid], kind="stable")]
+
+    probe_index, slots = _expand_matches(probe_codes, starts, counts)
+    return buckets[slots], probe_index
+
+def sort_merge_join(left_codes: np.ndarray, right_codes: np.ndarray, n_codes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Join by sorting both sides on their key and merging the runs of equal keys.
+
+    Args:
+        left_codes (np.ndarray): Key codes of the left side.
+        right_codes (np.ndarray): Key codes of the right side.
+        n_codes (int): Number of distinct key codes.
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Matched row positions on the left and right sides.
+    """
+    left_order = np.argsort(left_codes, kind="stable")
+    right_order = np.argsort(right_codes, kind="stable")
+    left_sorted, right_sorted = left_codes[left_order], right_codes[right_order]
+
+    # start of every key's run on the right side, found by merging the sorted key ranges
+    right_starts = np.searchsorted(right_sorted, np.arange(n_codes), side="left")
+    right_counts = np.searchsorted(right_sorted, np.arange(n_codes), side="right") - right_starts
+
+    left_pos, slots = _expand_matches(left_sorted, right_starts, right_counts)
+    return left_order[left_pos], right_order[slots]
+
+def choose_strategy(left_rows: int, right_rows: int) -> str:
+    """
+    Pick the join strategy for two inputs.
+
+    Args:
+        left_rows (int): Rows in the left dataset.
+        right_rows (int): Rows in the right dataset.
+    Returns:
+        str: "hash" when one side is small relative to the other, otherwise "sort-merge".
+    """
+    small, large = sorted((left_rows, right_rows))
+    if small <= HASH_JOIN_MAX_ROWS or small <= HASH_JOIN_MAX_RATIO * large:
+        return "hash"
+    return "sort-merge"
+
+def join_on_keys(left: pd.DataFrame, right: pd.DataFrame, left_on: List[str], right_on: List[str],
+                 strategy: Optional[str] = None) -> JoinResult:
+    """
+    Inner join two dataframes on key columns, returning matched row positions
+    ordered by the left dataset.
+
+    Args:
+        left (pd.DataFrame): The left dataset.
+        right (pd.DataFrame): The right dataset.
+        left_on (List[str]): Key columns of the left dataset.
+        right_on (List[str]): Key columns of the right dataset, paired with `left_on`.
+        strategy (Optional[str]): "hash" or "sort-merge"; chosen from the input sizes when omitted.
+    Returns:
+        JoinResult: The matched row positions and join metadata.
+    """
+    if not left_on or len(left_on) != len(right_on):
+        raise ValueError("Select the same number of key columns (at least one) for both datasets.")
+
+    strategy = strategy or choose_strategy(len(left), len(right))
+    left_codes, right_codes, n_codes = encode_keys(left[left_on], right[right_on])
+
+    if strategy == "hash":
+        if len(left) <= len(right):
+            left_index, right_index = hash_join(left_codes, right_codes, n_codes)
+        else:
+            right_index, left_index = hash_join(right_codes, left_codes, n_codes)
+    elif strategy == "sort-merge":
+        left_index, right_index = sort_merge_join(left_codes, right_codes, n_codes)
+    else:
+        raise ValueError(f"Unknown join strategy: {strategy}")
+
+    order = np.lexsort((right_index, left_index))
+    return JoinResult(left_index=left_index[order], right_index=right_index[order],
+                      strategy=strategy, left_rows=len(left), right_rows=len(right))
+
+def cached_join(left_key: str, right_key: str, left_on: List[str], right_on: List[str],
+                max_entries: int = 4) -> JoinResult:
+    """
+    Join two cleaned session datasets, reusing the result across reruns until either
+    dataset or its cleaning plan changes.
+
+    Args:
+        left_key (str): Name of the left dataset in `st.session_state["dataframes"]`.
+        right_key (str): Name of the right dataset in `st.session_state["dataframes"]`.
+        left_on (List[str]): Key columns of the left dataset.
+        right_on (List[str]): Key columns of the right dataset.
+        max_entries (int): Number of join results kept per session.
+    Returns:
+        JoinResult: The join result.
+    """
+    cache: Dict[tuple, JoinResult] = st.session_state.setdefault("joins", {})
+    cache_key = (left_key, dataset_version(left_key), tuple(left_on),
+                 right_key, dataset_version(right_key), tuple(right_on))
+
+    if cache_key not in cache:
+        cache[cache_key] = join_on_keys(cleaned_frame(left_key), cleaned_frame(right_key), left_on, right_on)
+        while len(cache) > max_entries:
+            cache.pop(next(iter(cache)))
+
+    return cache[cache_key]
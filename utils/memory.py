@@ -0,0 +1,370 @@
+import itertools
+import os
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+MEMORY_BUDGET_MB = float(os.environ.get("STATSGRAPH_MEMORY_BUDGET_MB", 2048))
+# spill files are written to a private (0700) directory created with mkdtemp, inside
+# STATSGRAPH_SPILL_DIR when it is set and the system temporary directory otherwise
+SPILL_PARENT = os.environ.get("STATSGRAPH_SPILL_DIR")
+
+EntryKey = Tuple[str, str]
+
+# dataset versions are drawn from one server-wide counter so they never repeat across sessions
+_version_counter = itertools.count(1)
+
+def estimate_nbytes(df: pd.DataFrame, sample_size: int = 1000) -> int:
+    """
+    Estimate the memory footprint of a dataframe.
+
+    Fixed-width columns are measured exactly; the deep size of object columns is
+    extrapolated from a sample so the estimate stays cheap on large text columns.
+
+    Args:
+        df (pd.DataFrame): The dataframe to measure.
+        sample_size (int): Number of rows sampled for object columns.
+    Returns:
+        int: Estimated size in bytes.
+    """
+    nbytes = int(df.memory_usage(index=True, deep=False).sum())
+    object_cols = df.columns[df.dtypes == object]
+    if len(object_cols) and len(df):
+        sample = df[object_cols].head(sample_size)
+        extra = sample.memory_usage(index=False, deep=True).sum() - sample.memory_usage(index=False, deep=False).sum()
+        nbytes += int(extra * len(df) / len(sample))
+    return nbytes
+
+class _Entry:
+    """
+    A dataset tracked by the MemoryManager.
+
+    Its state is "resident" (in RAM), "spilled" (on disk), or one of the transient states
+    "spilling" (being written to disk, still readable from RAM) and "loading" (being read
+    back by one thread; other readers wait on `loaded`).
+    """
+
+    def __init__(self, frame: pd.DataFrame) -> None:
+        self.frame: Optional[pd.DataFrame] = frame
+        self.path: Optional[Path] = None
+        self.state = "resident"
+        self.loaded: Optional[threading.Event] = None
+        self.nbytes = estimate_nbytes(frame)
+        self.last_access = time.time()
+
+    @property
+    def resident(self) -> bool:
+        return self.frame is not None
+
+class MemoryManager:
+    """
+    Tracks the datasets of every session on the server and keeps their combined
+    in-memory footprint under a budget by spilling the least recently used ones to disk.
+
+    The lock only guards the bookkeeping: pickling to and from disk happens outside it,
+    so one session reloading or spilling a large dataset does not block the others.
+    """
+
+    def __init__(self, budget_bytes: int, spill_parent: Optional[str] = None) -> None:
+        """
+        Args:
+            budget_bytes (int): Maximum number of bytes of datasets kept in RAM.
+            spill_parent (Optional[str]): Directory in which the private spill directory is
+                created. Defaults to the system temporary directory.
+        """
+        self.budget_bytes = budget_bytes
+        self.spill_parent = spill_parent
+        self._spill_dir: Optional[Path] = None
+        self._entries: "OrderedDict[EntryKey, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def spill_dir(self) -> Path:
+        """The private directory spill files are written to, created on first use."""
+        with self._lock:
+            if self._spill_dir is None:
+                if self.spill_parent is not None:
+                    Path(self.spill_parent).mkdir(parents=True, exist_ok=True)
+                self._spill_dir = Path(tempfile.mkdtemp(prefix="statsgraph-spill-", dir=self.spill_parent))
+            return self._spill_dir
+
+    def put(self, owner: str, key: str, df: pd.DataFrame) -> bool:
+        """
+        Store a dataset, replacing any previous dataset under the same key.
+
+        Args:
+            owner (str): Identifier of the owning session.
+            key (str): Name of the dataset within the session.
+            df (pd.DataFrame): The dataset.
+        Returns:
+            bool: False if `df` is the dataset already stored under the key, True otherwise.
+        """
+        with self._lock:
+            current = self._entries.get((owner, key))
+            if current is not None and current.frame is df:
+                self._touch((owner, key))
+                return False
+
+            self.remove(owner, key)
+            self._entries[(owner, key)] = _Entry(df)
+            victims = self._select_victims(protect=(owner, key))
+        self._spill(victims)
+        return True
+
+    def get(self, owner: str, key: str) -> pd.DataFrame:
+        """
+        Return a dataset, transparently reloading it from disk if it was spilled.
+
+        Args:
+            owner (str): Identifier of the owning session.
+            key (str): Name of the dataset within the session.
+        Returns:
+            pd.DataFrame: The dataset.
+        Raises:
+            KeyError: If the dataset is not tracked.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries[(owner, key)]
+                if entry.state == "spilling":
+                    # still in RAM: keep it there, the writer discards its file
+                    entry.state = "resident"
+                if entry.state == "resident":
+                    self._touch((owner, key))
+                    frame = entry.frame
+                    victims = self._select_victims(protect=(owner, key))
+                    break
+                if entry.state == "spilled":
+                    entry.state = "loading"
+                    entry.loaded = threading.Event()
+                    frame = None
+                    break
+                loaded = entry.loaded
+            # another thread is reading this dataset back; wait for it and look again
+            loaded.wait()
+
+        if frame is not None:
+            self._spill(victims)
+            return frame
+        return self._load((owner, key), entry)
+
+    def _load(self, entry_key: EntryKey, entry: _Entry) -> pd.DataFrame:
+        try:
+            frame = pd.read_pickle(entry.path)
+        except BaseException:
+            with self._lock:
+                entry.state = "spilled"
+                entry.loaded.set()
+                removed = self._entries.get(entry_key) is not entry
+            if removed:
+                entry.path.unlink(missing_ok=True)
+            raise
+        entry.path.unlink(missing_ok=True)
+
+        with self._lock:
+            entry.frame, entry.path, entry.state = frame, None, "resident"
+            entry.loaded.set()
+            victims = []
+            if self._entries.get(entry_key) is entry:
+                self._touch(entry_key)
+                victims = self._select_victims(protect=entry_key)
+        self._spill(victims)
+        return frame
+
+    def remove(self, owner: str, key: str) -> None:
+        """
+        Forget a dataset and delete its spill file, if any.
+
+        Args:
+            owner (str): Identifier of the owning session.
+            key (str): Name of the dataset within the session.
+        """
+        with self._lock:
+            entry = self._entries.pop((owner, key), None)
+            # files of entries being spilled or loaded are deleted by the thread doing the I/O
+            if entry is not None and entry.state == "spilled":
+                entry.path.unlink(missing_ok=True)
+
+    def release(self, owner: str) -> None:
+        """
+        Forget every dataset of a session.
+
+        Args:
+            owner (str): Identifier of the owning session.
+        """
+        with self._lock:
+            for entry_owner, key in list(self._entries.keys()):
+                if entry_owner == owner:
+                    self.remove(entry_owner, key)
+
+    def usage(self, owner: Optional[str] = None) -> Dict[str, int]:
+        """
+        Report the footprint of tracked datasets.
+
+        Args:
+            owner (Optional[str]): Restrict the report to one session.
+        Returns:
+            Dict[str, int]: Bytes held in RAM ("resident") and on disk ("spilled").
+        """
+        with self._lock:
+            entries = [entry for (entry_owner, _), entry in self._entries.items()
+                       if owner is None or entry_owner == owner]
+        return {
+            "resident": sum(entry.nbytes for entry in entries if entry.resident),
+            "spilled": sum(entry.nbytes for entry in entries if not entry.resident),
+        }
+
+    def _touch(self, entry_key: EntryKey) -> None:
+        self._entries.move_to_end(entry_key)
+        self._entries[entry_key].last_access = time.time()
+
+    def _select_victims(self, protect: EntryKey) -> List[Tuple[EntryKey, _Entry, pd.DataFrame]]:
+        # called under the lock: mark least recently used datasets for spilling until the
+        # rest fits the budget; the caller writes them with `_spill` after releasing the lock
+        resident = sum(entry.nbytes for entry in self._entries.values() if entry.state in ("resident", "loading"))
+        victims = []
+        for entry_key, entry in self._entries.items():
+            if resident <= self.budget_bytes:
+                break
+            if entry_key == protect or entry.state != "resident":
+                continue
+            entry.state = "spilling"
+            victims.append((entry_key, entry, entry.frame))
+            resident -= entry.nbytes
+        return victims
+
+    def _spill(self, victims: List[Tuple[EntryKey, _Entry, pd.DataFrame]]) -> None:
+        for entry_key, entry, frame in victims:
+            path = self.spill_dir / f"{uuid.uuid4().hex}.pkl"
+            try:
+                # pickle keeps every dtype (including edited and mixed object columns) intact
+                frame.to_pickle(path)
+            except BaseException:
+                with self._lock:
+                    if entry.state == "spilling":
+                        entry.state = "resident"
+                path.unlink(missing_ok=True)
+                raise
+            with self._lock:
+                # the entry may have been read (and kept in RAM), removed or spilled by another
+                # thread meanwhile
+                if entry.state == "spilling" and entry.frame is frame and self._entries.get(entry_key) is entry:
+                    entry.frame, entry.path, entry.state = None, path, "spilled"
+                    continue
+            path.unlink(missing_ok=True)
+
+@st.cache_resource
+def get_memory_manager() -> MemoryManager:
+    """Returns the MemoryManager shared by every session on this server."""
+    return MemoryManager(budget_bytes=int(MEMORY_BUDGET_MB * 2**20), spill_parent=SPILL_PARENT)
+
+class SessionFrames(MutableMapping):
+    """
+    Dict-like store for a session's dataframes backed by the server MemoryManager.
+
+    Used as `st.session_state["dataframes"]`; datasets spilled to disk are reloaded
+    on access, and everything is released when the session is garbage collected.
+    """
+
+    def __init__(self, manager: Optional[MemoryManager] = None) -> None:
+        """
+        Args:
+            manager (Optional[MemoryManager]): Manager to register with. Defaults to the server-wide one.
+        """
+        self.owner = uuid.uuid4().hex
+        self._manager = manager or get_memory_manager()
+        self._keys: List[str] = []
+        self._versions: Dict[str, int] = {}
+        weakref.finalize(self, self._manager.release, self.owner)
+
+    def __getitem__(self, key: str) -> pd.DataFrame:
+        if key not in self._keys:
+            raise KeyError(key)
+        return self._manager.get(self.owner, key)
+
+    def __setitem__(self, key: str, df: pd.DataFrame) -> None:
+        if self._manager.put(self.owner, key, df):
+            self._versions[key] = next(_version_counter)
+        if key not in self._keys:
+            self._keys.append(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self._keys:
+            raise KeyError(key)
+        self._manager.remove(self.owner, key)
+        self._manager.remove(self.owner, self._derived_key(key))
+        self._keys.remove(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._keys))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def version(self, key: str) -> int:
+        """
+        Returns a number that changes every time the dataset under `key` is replaced,
+        so derived results can be cached per dataset version.
+        """
+        if key not in self._keys:
+            raise KeyError(key)
+        return self._versions[key]
+
+    @staticmethod
+    def _derived_key(key: str) -> str:
+        return f"derived::{key}"
+
+    def put_derived(self, key: str, df: pd.DataFrame) -> None:
+        """
+        Store a dataframe computed from the dataset under `key` (e.g. its cleaned version),
+        so it counts towards the memory budget and can be spilled like the dataset itself.
+        """
+        self._manager.put(self.owner, self._derived_key(key), df)
+
+    def get_derived(self, key: str) -> Optional[pd.DataFrame]:
+        """Returns the dataframe stored with `put_derived`, or None if there is none."""
+        try:
+            return self._manager.get(self.owner, self._derived_key(key))
+        except KeyError:
+            return None
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Returns the bytes this session holds in RAM ("resident") and on disk ("spilled")."""
+        return self._manager.usage(self.owner)
+
+def memory_sidebar() -> None:
+    """
+    Show the memory used by the current session and the server in the sidebar.
+
+    Returns:
+        None
+    """
+    frames = st.session_state.get("dataframes")
+    if not isinstance(frames, SessionFrames):
+        return
+
+    session = frames.memory_usage()
+    server = get_memory_manager().usage()
+    budget = get_memory_manager().budget_bytes
+
+    sidebar = st.sidebar
+    sidebar.caption(
+        f"💾 Session memory: {session['resident'] / 2**20:,.1f} MB in RAM, "
+        f"{session['spilled'] / 2**20:,.1f} MB spilled to disk"
+    )
+    sidebar.progress(
+        min(server["resident"] / budget, 1.0) if budget else 1.0,
+        text=f"Server: {server['resident'] / 2**20:,.0f} / {budget / 2**20:,.0f} MB",
+    )
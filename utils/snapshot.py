@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+import secrets
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import joblib
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+from utils.cleaning import CleaningPlan
+from utils.memory import SessionFrames
+
+SNAPSHOT_DIR = Path(os.environ.get("STATSGRAPH_SNAPSHOT_DIR", Path.home() / ".statsgraph" / "snapshots"))
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+# schema metadata listing the columns stored as Arrow-backed strings, which pandas' own
+# metadata does not tell apart from Python-backed ones
+ARROW_STRINGS_KEY = b"statsgraph.arrow_strings"
+# what a missing, truncated or otherwise unreadable snapshot part raises
+SNAPSHOT_ERRORS = (OSError, ValueError, TypeError, KeyError, EOFError, pickle.UnpicklingError, pa.ArrowException)
+
+# A snapshot is a directory holding one file per dataset and per model plus a JSON manifest.
+# Datasets are Arrow IPC files with LZ4-compressed buffers, so a restore decompresses every
+# dataset into memory rather than memory-mapping it; frames Arrow cannot represent (e.g.
+# mixed-type object columns) fall back to gzipped pickles.
+# Every part records a fingerprint of what it was written from, so saving again only rewrites
+# the parts that changed, and the manifest is replaced last so a bundle is never half-written.
+# Snapshots live in a private directory per owner: the logged-in user when authentication is
+# configured, otherwise a random snapshot key that the analyst keeps to restore them later.
+
+def snapshot_owner() -> str:
+    """
+    Identify whose snapshots the current session can see.
+
+    Returns:
+        str: The logged-in user's identity, or the session's snapshot key.
+    """
+    if st.user.get("is_logged_in"):
+        return f"user:{st.user.get('sub') or st.user.get('email')}"
+    return f"key:{st.session_state.setdefault('snapshot_key', secrets.token_urlsafe(16))}"
+
+def owner_dir(owner: str) -> Path:
+    """Returns the snapshot directory of an owner; its name does not reveal the owner."""
+    return SNAPSHOT_DIR / hashlib.sha256(owner.encode("utf-8")).hexdigest()[:32]
+
+def snapshot_path(name: str, owner: str) -> Path:
+    """
+    Resolve the directory of a named snapshot.
+
+    Args:
+        name (str): Snapshot name; letters, digits, "-" and "_" only.
+        owner (str): Owner of the snapshot, see `snapshot_owner`.
+    Returns:
+        Path: The snapshot directory.
+    """
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", name):
+        raise ValueError("Snapshot names may only contain letters, digits, '-' and '_'.")
+    return owner_dir(owner) / name
+
+def list_snapshots(owner: str) -> List[str]:
+    """Returns the names of the owner's saved snapshots, most recent first."""
+    directory = owner_dir(owner)
+    if not directory.exists():
+        return []
+    bundles = [path for path in directory.iterdir() if (path / MANIFEST).exists()]
+    return [path.name for path in sorted(bundles, key=lambda path: (path / MANIFEST).stat().st_mtime, reverse=True)]
+
+def read_manifest(path: Path) -> Dict[str, Any]:
+    manifest_file = path / MANIFEST
+    if not manifest_file.exists():
+        return {"format": FORMAT_VERSION, "datasets": {}, "models": {}, "plans": {}}
+    return json.loads(manifest_file.read_text())
+
+def _write_manifest(path: Path, manifest: Dict[str, Any]) -> None:
+    tmp = path / f"{MANIFEST}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2, default=str))
+    os.replace(tmp, path / MANIFEST)
+
+def write_frame(df: pd.DataFrame, path: Path) -> str:
+    """
+    Write a dataframe as a compressed Arrow IPC file, or a gzipped pickle if Arrow cannot hold it.
+
+    Args:
+        df (pd.DataFrame): The dataframe.
+        path (Path): Destination file, without suffix.
+    Returns:
+        str: The name of the written file.
+    """
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        fields = [column["field_name"] for column in table.schema.pandas_metadata["columns"]]
+        arrow_strings = [[position, fields[position]] for position, dtype in enumerate(df.dtypes)
+                         if isinstance(dtype, pd.StringDtype) and dtype.storage == "pyarrow"]
+        table = table.replace_schema_metadata({**table.schema.metadata,
+                                               ARROW_STRINGS_KEY: json.dumps(arrow_strings).encode()})
+        target = path.with_suffix(".arrow")
+        options = pa.ipc.IpcWriteOptions(compression="lz4")
+        with pa.OSFile(str(target), "wb") as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        target = path.with_suffix(".pkl.gz")
+        df.to_pickle(target, compression={"method": "gzip", "compresslevel": 1})
+    return target.name
+
+def read_frame(path: Path) -> pd.DataFrame:
+    """
+    Read a dataframe written by `write_frame`, with the dtypes it was written with.
+
+    Args:
+        path (Path): The file.
+    Returns:
+        pd.DataFrame: The dataframe.
+    """
+    if path.suffix != ".arrow":
+        return pd.read_pickle(path)
+
+    with pa.OSFile(str(path), "rb") as source:
+        table = pa.ipc.open_file(source).read_all()
+    arrow_strings = json.loads((table.schema.metadata or {}).get(ARROW_STRINGS_KEY, b"[]"))
+    if not arrow_strings:
+        return table.to_pandas()
+    # pandas would rebuild Arrow-backed string columns as Python strings, so they are left out
+    # of the conversion and wrapped around their Arrow data afterwards, without a copy
+    columns = table.slice(0, 0).to_pandas().columns
+    df = table.drop_columns([field for _, field in arrow_strings]).to_pandas()
+    for position, field in arrow_strings:
+        df.insert(position, columns[position], pd.arrays.ArrowStringArray(table.column(field)),
+                  allow_duplicates=True)
+    return df
+
+def _fingerprint(frames: SessionFrames, key: str) -> str:
+    return f"{frames.owner}:{frames.version(key)}"
+
+def save_snapshot(name: str, owner: str) -> Dict[str, int]:
+    """
+    Save the session's datasets, cleaning plans and fitted models to a named snapshot,
+    rewriting only the datasets and models that changed since it was last saved.
+
+    Args:
+        name (str): Snapshot name.
+        owner (str): Owner of the snapshot, see `snapshot_owner`.
+    Returns:
+        Dict[str, int]: Number of parts "written" and "reused".
+    """
+    path = snapshot_path(name, owner)
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    path.parent.mkdir(mode=0o700, exist_ok=True)
+    path.mkdir(mode=0o700, exist_ok=True)
+    previous = read_manifest(path)
+    frames: SessionFrames = st.session_state["dataframes"]
+    models: Dict[str, Dict[str, Any]] = st.session_state.get("models", {})
+    plans: Dict[str, CleaningPlan] = st.session_state.get("cleaning_plans", {})
+
+    manifest: Dict[str, Any] = {"format": FORMAT_VERSION, "created": time.time(),
+                                "datasets": {}, "models": {}, "plans": {}}
+    counts = {"written": 0, "reused": 0}
+
+    for key in frames:
+        fingerprint = _fingerprint(frames, key)
+        old = previous["datasets"].get(key)
+        if old is not None and old["fingerprint"] == fingerprint and (path / old["file"]).exists():
+            manifest["datasets"][key] = old
+            counts["reused"] += 1
+            continue
+        file_name = write_frame(frames[key], path / f"data-{uuid.uuid4().hex}")
+        manifest["datasets"][key] = {"file": file_name, "fingerprint": fingerprint}
+        counts["written"] += 1
+
+    for label, entry in models.items():
+        old = previous["models"].get(label)
+        if old is not None and old["fingerprint"] == entry["id"] and (path / old["file"]).exists():
+            manifest["models"][label] = old
+            counts["reused"] += 1
+            continue
+        file_name = f"model-{uuid.uuid4().hex}.joblib"
+        joblib.dump(entry["model"], path / file_name, compress=3)
+        manifest["models"][label] = {"file": file_name, "fingerprint": entry["id"]}
+        counts["written"] += 1
+
+    manifest["plans"] = {key: plan.to_dict() for key, plan in plans.items() if key in frames}
+    _write_manifest(path, manifest)
+
+    # drop parts that the new manifest no longer references
+    referenced = {part["file"] for group in ("datasets", "models") for part in manifest[group].values()}
+    for file in path.iterdir():
+        if file.name != MANIFEST and file.name not in referenced:
+            file.unlink(missing_ok=True)
+
+    return counts
+
+def restore_snapshot(name: str, owner: str) -> None:
+    """
+    Replace the session's datasets, cleaning plans and fitted models with a saved snapshot.
+    Every dataset is read into memory (and counts towards the memory budget) up front; the
+    session is left untouched if any part cannot be read.
+
+    Args:
+        name (str): Snapshot name.
+        owner (str): Owner of the snapshot, see `snapshot_owner`.
+    Raises:
+        SNAPSHOT_ERRORS: If the manifest or one of its parts is missing or unreadable.
+    """
+    path = snapshot_path(name, owner)
+    manifest = read_manifest(path)
+
+    frames = SessionFrames()
+    try:
+        for key, part in manifest["datasets"].items():
+            frames[key] = read_frame(path / part["file"])
+            # the restored frames are exactly what is on disk, so the next save can reuse them
+            part["fingerprint"] = _fingerprint(frames, key)
+
+        models = {}
+        for label, part in manifest["models"].items():
+            models[label] = {"id": part["fingerprint"], "model": joblib.load(path / part["file"])}
+        plans = {key: CleaningPlan.from_dict(steps) for key, steps in manifest["plans"].items()}
+    except BaseException:
+        frames.clear()
+        raise
+
+    previous: Optional[SessionFrames] = st.session_state.get("dataframes")
+    if isinstance(previous, SessionFrames):
+        previous.clear()
+
+    st.session_state["dataframes"] = frames
+    st.session_state["models"] = models
+    st.session_state["cleaning_plans"] = plans
+    st.session_state["state"] = 1 if len(frames) else 0
+    _write_manifest(path, manifest)
+
+def snapshot_sidebar() -> None:
+    """
+    Render the save and restore controls in the sidebar.
+
+    Returns:
+        None
+    """
+    with st.sidebar.expander("💾 Snapshots"):
+        owner = snapshot_owner()
+        if not st.user.get("is_logged_in"):
+            st.text_input("Snapshot key", key="snapshot_key", type="password",
+                          help="Your snapshots are only visible with this key. Copy it to restore them "
+                               "in a later session, or paste a key you saved before.")
+
+        # a fresh default name per session, so saving without renaming never overwrites another snapshot
+        st.session_state.setdefault("snapshot_name", time.strftime("session-%Y%m%d-%H%M%S"))
+        name = st.text_input("Snapshot name", key="snapshot_name")
+        if st.button("Save snapshot", disabled=not isinstance(st.session_state.get("dataframes"), SessionFrames)):
+            try:
+                with st.spinner("Saving snapshot..."):
+                    counts = save_snapshot(name, owner)
+                st.success(f"Saved '{name}': {counts['written']} part(s) written, {counts['reused']} unchanged.")
+            except SNAPSHOT_ERRORS as e:
+                st.error(f"The snapshot could not be saved: {e}")
+
+        snapshots = list_snapshots(owner)
+        if not snapshots:
+            return
+
+        choice = st.selectbox("Saved snapshots", snapshots, key="snapshot_choice")
+        if st.button("Restore snapshot"):
+            try:
+                with st.spinner("Restoring snapshot..."):
+                    restore_snapshot(choice, owner)
+            except SNAPSHOT_ERRORS as e:
+                st.error(f"Snapshot '{choice}' could not be restored: {e}")
+                return
+            st.rerun()